@@ -2,9 +2,13 @@
 🚀 FAST TRAINING - Run this script!
 70 epochs, optimized for speed
 Estimated: 15-45 min (GPU) or 1-3 hours (CPU)
+
+Or give it a time budget instead: python RUN_THIS.py 40
+(trains for as many epochs as fit in 40 minutes, see time_budget.py)
 """
 
 import os
+import sys
 import yaml
 from ultralytics import YOLO
 
@@ -33,6 +37,20 @@ with open('data.yaml', 'r') as f:
     classes = yaml.safe_load(f).get('names', [])
     print(f"✅ Classes: {classes}")
 
+# Time budget mode
+if len(sys.argv) > 1:
+    from time_budget import train_within
+    minutes = float(sys.argv[1])
+    print(f"\n⏱️  Training within {minutes:g} minutes...")
+    best, onnx_path, seconds = train_within(
+        minutes, 'data.yaml', batch=32, workers=8, cache=True, amp=True,
+    )
+    print(f"\n✅ Done in {seconds / 60:.1f} min!")
+    print(f"\n📋 Next:")
+    print(f"1. Copy: {onnx_path} → public/models/yolov5.onnx")
+    input("\nPress Enter to exit...")
+    sys.exit(0)
+
 # Train
 print("\n⚡ Starting FAST training...")
 print("   - 70 epochs")
@@ -0,0 +1,290 @@
+"""
+Pipeline performance benchmarks - notice when training, export or
+inference gets slower.
+
+Runs every stage of the train_fast.py / convert_to_onnx.py flow on a small
+synthetic YOLO-format dataset generated locally (no Roboflow download):
+  dataset_load     build the ultralytics dataset and load every sample
+  train_epoch      one training epoch on CPU (yolov5n from yaml, no download)
+  val              the validation pass ultralytics runs after the last epoch
+  export           ONNX export
+  session_create   median onnxruntime InferenceSession creation
+  inference        median per-frame inference
+
+Results are appended to benchmarks/history.jsonl keyed by git commit and
+machine; only runs from the same machine are compared.
+
+Usage:
+    python benchmark.py run [--repeat 3]         # benchmark the current commit (best of N)
+    python benchmark.py compare [BASE] [HEAD]    # exit 1 on regressions
+        --tolerance 0.15                         # allowed slowdown (15%)
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HISTORY = os.path.join('benchmarks', 'history.jsonl')
+CLASSES = ['Distracted', 'Normal', 'Object Deteced']
+IMGSZ = 320
+TRAIN_IMAGES = 64
+VAL_IMAGES = 16
+INFERENCE_RUNS = 30
+SESSION_RUNS = 5
+REPEAT = 3
+TOLERANCE = 0.15
+
+
+def make_synthetic_dataset(root, n_train=TRAIN_IMAGES, n_val=VAL_IMAGES, imgsz=IMGSZ, seed=0):
+    """Random boxes on noise in train/ and valid/, plus data.yaml."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    for split, count in (('train', n_train), ('valid', n_val)):
+        os.makedirs(os.path.join(root, split, 'images'), exist_ok=True)
+        os.makedirs(os.path.join(root, split, 'labels'), exist_ok=True)
+        for i in range(count):
+            im = rng.integers(0, 255, (imgsz, imgsz, 3), dtype=np.uint8)
+            lines = []
+            for _ in range(rng.integers(1, 4)):
+                c = int(rng.integers(len(CLASSES)))
+                w, h = rng.uniform(0.1, 0.5, 2)
+                x, y = rng.uniform(w / 2, 1 - w / 2), rng.uniform(h / 2, 1 - h / 2)
+                x0, y0 = int((x - w / 2) * imgsz), int((y - h / 2) * imgsz)
+                x1, y1 = int((x + w / 2) * imgsz), int((y + h / 2) * imgsz)
+                color = [0, 0, 0]
+                color[c] = 255
+                cv2.rectangle(im, (x0, y0), (x1, y1), color, -1)
+                lines.append(f"{c} {x:.6f} {y:.6f} {w:.6f} {h:.6f}")
+            cv2.imwrite(os.path.join(root, split, 'images', f'{i:04d}.jpg'), im)
+            with open(os.path.join(root, split, 'labels', f'{i:04d}.txt'), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    data_yaml = os.path.join(root, 'data.yaml')
+    with open(data_yaml, 'w', encoding='utf-8') as f:
+        json.dump({
+            'train': os.path.join(root, 'train', 'images'),
+            'val': os.path.join(root, 'valid', 'images'),
+            'nc': len(CLASSES),
+            'names': CLASSES,
+        }, f)  # JSON is valid YAML
+    return data_yaml
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def bench_dataset_load(root, imgsz=IMGSZ):
+    from ultralytics.data.dataset import YOLODataset
+
+    def load():
+        dataset = YOLODataset(
+            img_path=os.path.join(root, 'train', 'images'), imgsz=imgsz, augment=False,
+            data={'names': CLASSES, 'nc': len(CLASSES)}, task='detect',
+        )
+        for i in range(len(dataset)):
+            dataset[i]
+    return _timed(load)[1]
+
+
+def bench_train_epoch(data_yaml, project, imgsz=IMGSZ):
+    """Returns (training seconds, validation seconds, best.pt).
+
+    val=False does not skip the validation after the last epoch, so it is
+    timed on its own between on_train_epoch_end and on_fit_epoch_end.
+    """
+    from ultralytics import YOLO
+
+    marks = {}
+
+    def mark(name):
+        return lambda trainer: marks.setdefault(name, time.perf_counter())
+
+    model = YOLO('yolov5n.yaml')
+    model.add_callback('on_train_epoch_start', mark('start'))
+    model.add_callback('on_train_epoch_end', mark('trained'))
+    model.add_callback('on_fit_epoch_end', mark('validated'))
+    model.train(
+        data=data_yaml, epochs=1, imgsz=imgsz, batch=16, device='cpu', workers=0,
+        val=False, plots=False, amp=False, project=project, name='bench', seed=0,
+        deterministic=True, verbose=False,
+    )
+    weights = model.trainer.best if os.path.exists(model.trainer.best) else model.trainer.last
+    return marks['trained'] - marks['start'], marks['validated'] - marks['trained'], str(weights)
+
+
+def bench_export(weights, imgsz=IMGSZ):
+    """Returns (seconds, onnx path)."""
+    from ultralytics import YOLO
+
+    onnx_path, seconds = _timed(lambda: YOLO(weights).export(format='onnx', imgsz=imgsz))
+    return seconds, str(onnx_path)
+
+
+def bench_session(onnx_path, runs=INFERENCE_RUNS):
+    """Returns (median session creation seconds, median per-frame seconds)."""
+    import numpy as np
+    import onnxruntime as ort
+
+    creations = sorted(
+        _timed(lambda: ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider']))[1]
+        for _ in range(SESSION_RUNS)
+    )
+    create = creations[len(creations) // 2]
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    model_input = session.get_inputs()[0]
+    frame = np.random.rand(*[d if isinstance(d, int) else 1 for d in model_input.shape]).astype(np.float32)
+    for _ in range(3):
+        session.run(None, {model_input.name: frame})
+    timings = sorted(_timed(lambda: session.run(None, {model_input.name: frame}))[1] for _ in range(runs))
+    return create, timings[len(timings) // 2]
+
+
+def run_suite():
+    """All stages on a fresh synthetic dataset; returns {stage: seconds}."""
+    work = tempfile.mkdtemp(prefix='tracksmart-bench-')
+    try:
+        data_yaml = make_synthetic_dataset(work)
+        results = {'dataset_load': bench_dataset_load(work)}
+        results['train_epoch'], results['val'], weights = bench_train_epoch(data_yaml, os.path.join(work, 'runs'))
+        results['export'], onnx_path = bench_export(weights)
+        results['session_create'], results['inference'] = bench_session(onnx_path)
+        return results
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def load_history(path=HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(entry, path=HISTORY):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+
+def current_machine():
+    return f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)"
+
+
+def find_entry(history, commit, machine=None):
+    """Latest entry whose commit starts with `commit` (on `machine`, if given)."""
+    for entry in reversed(history):
+        if machine and entry.get('machine') != machine:
+            continue
+        if entry['commit'].startswith(commit) or commit.startswith(entry['commit']):
+            return entry
+    return None
+
+
+def compare(base, head, tolerance=TOLERANCE):
+    """List of (stage, base_s, head_s, change, regressed)."""
+    rows = []
+    for stage, base_s in base['results'].items():
+        if stage not in head['results']:
+            continue
+        head_s = head['results'][stage]
+        change = head_s / base_s - 1 if base_s else 0.0
+        rows.append((stage, base_s, head_s, change, change > tolerance))
+    return rows
+
+
+def cmd_run(args):
+    print("=" * 60)
+    print("Pipeline Benchmarks")
+    print("=" * 60)
+
+    results = {}
+    for i in range(args.repeat):
+        print(f"\n⏱️  Run {i + 1}/{args.repeat}...")
+        for stage, seconds in run_suite().items():
+            results[stage] = min(seconds, results.get(stage, seconds))
+
+    entry = {
+        'commit': current_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': current_machine(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    append_history(entry)
+
+    print()
+    for stage, seconds in results.items():
+        print(f"   {stage:<16} {seconds * 1000:10.1f} ms")
+    print(f"\n✅ Saved to {HISTORY} (commit {entry['commit']})")
+
+
+def cmd_compare(args):
+    # Timings from different machines are not comparable; stick to this one
+    machine = current_machine()
+    history = [e for e in load_history() if e.get('machine') == machine]
+    if len(history) < 2 and not (args.base and args.head):
+        print(f"❌ Need at least two benchmark runs on this machine ({machine})")
+        sys.exit(1)
+
+    head = find_entry(history, args.head, machine) if args.head else history[-1]
+    if args.base:
+        base = find_entry(history, args.base, machine)
+    else:
+        earlier = [e for e in history if e is not head and e['commit'] != head['commit']]
+        base = earlier[-1] if earlier else None
+    if not base or not head:
+        print(f"❌ Commit not found in history for this machine ({machine})")
+        sys.exit(1)
+
+    print(f"Comparing {base['commit']} → {head['commit']} on {machine} (tolerance {args.tolerance:.0%})\n")
+    regressions = 0
+    for stage, base_s, head_s, change, regressed in compare(base, head, args.tolerance):
+        mark = '❌' if regressed else '✅'
+        print(f"   {mark} {stage:<16} {base_s * 1000:10.1f} → {head_s * 1000:10.1f} ms  ({change:+.1%})")
+        regressions += regressed
+
+    if regressions:
+        print(f"\n❌ {regressions} stage(s) slower than allowed")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline performance benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help="benchmark the current commit")
+    run.add_argument('--repeat', type=int, default=REPEAT, help="keep the best of N runs")
+    cmp = sub.add_parser('compare', help="fail on regressions between two commits")
+    cmp.add_argument('base', nargs='?')
+    cmp.add_argument('head', nargs='?')
+    cmp.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        cmd_run(args)
+    else:
+        cmd_compare(args)
+
+
+if __name__ == "__main__":
+    main()
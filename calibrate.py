@@ -0,0 +1,248 @@
+"""
+Per-class threshold calibration - run after training, ship next to the model.
+
+useYOLOv5Detection used one global confidenceThreshold (0.5) for every
+class, although the classes behave very differently. This script:
+1. Runs the model on valid/ and matches predictions to ground truth
+2. Builds a precision/recall curve for every class
+3. Picks the lowest threshold per class that still reaches the target
+   precision (fewer false distraction alerts, as much recall as possible)
+4. Optionally fits temperature scaling so reported confidences are calibrated
+5. Writes <model>.calibration.json next to the exported model
+
+The hook loads it through the calibrationPath option, rejects candidates
+below the smallest class threshold before looking at class scores, and uses
+the class names from the file. Thresholds are only valid at the image size
+they were fitted at (written as imgsz); the hook warns when its inputSize
+differs.
+
+Usage:
+    python calibrate.py best.pt data.yaml [--precision 0.9] [--temperature]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import yaml
+
+from dataset_shards import open_source, parse_label
+
+IMGSZ = 416
+TARGET_PRECISION = 0.9
+IOU_MATCH = 0.5
+MIN_SCORE = 0.001
+BATCH = 16
+
+
+def _xywh_to_xyxy(boxes):
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+
+
+def _iou(a, b):
+    """Pairwise IoU between (n, 4) and (m, 4) xyxy boxes."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_predictions(pred_boxes, pred_cls, pred_scores, gt_boxes, gt_cls, iou=IOU_MATCH):
+    """Greedy highest-score-first matching; returns a TP flag per prediction."""
+    tp = np.zeros(len(pred_scores), dtype=bool)
+    if not len(gt_cls) or not len(pred_scores):
+        return tp
+    ious = _iou(pred_boxes, gt_boxes)
+    used = np.zeros(len(gt_cls), dtype=bool)
+    for p in np.argsort(-pred_scores):
+        candidates = (gt_cls == pred_cls[p]) & ~used & (ious[p] >= iou)
+        if candidates.any():
+            g = np.argmax(np.where(candidates, ious[p], -1))
+            used[g] = True
+            tp[p] = True
+    return tp
+
+
+def collect_predictions(weights, data_yaml, imgsz=IMGSZ):
+    """Scores, classes and TP flags of every prediction on the val split,
+    plus the ground-truth count per class."""
+    import cv2
+    from ultralytics import YOLO
+
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    reader = open_source(data['val'])
+    if not len(reader):
+        raise ValueError(f"Validation split {data['val']} has no images")
+    model = YOLO(weights)
+    nc = len(model.names)
+
+    scores, classes, tps = [], [], []
+    n_gt = np.zeros(nc, dtype=np.int64)
+    for start in range(0, len(reader), BATCH):
+        images, truths = [], []
+        for i in range(start, min(start + BATCH, len(reader))):
+            image_bytes, label_text = reader.read(i)
+            images.append(cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR))
+            cls, boxes = parse_label(label_text)
+            gt_cls = np.array([c[0] for c in cls], dtype=np.int64)
+            if len(gt_cls) and gt_cls.max() >= nc:
+                raise ValueError(
+                    f"Label {reader.key(i)} uses class {gt_cls.max()}, "
+                    f"but the model has {nc} classes ({', '.join(model.names.values())})"
+                )
+            truths.append((gt_cls, _xywh_to_xyxy(boxes)))
+
+        for result, (gt_cls, gt_boxes) in zip(
+            model.predict(images, imgsz=imgsz, conf=MIN_SCORE, verbose=False), truths
+        ):
+            n_gt += np.bincount(gt_cls, minlength=nc)
+            pred_cls = result.boxes.cls.cpu().numpy().astype(np.int64)
+            pred_scores = result.boxes.conf.cpu().numpy()
+            pred_boxes = result.boxes.xyxyn.cpu().numpy()
+            tps.append(match_predictions(pred_boxes, pred_cls, pred_scores, gt_boxes, gt_cls))
+            scores.append(pred_scores)
+            classes.append(pred_cls)
+
+    names = [model.names[i] for i in range(nc)]
+    return np.concatenate(scores), np.concatenate(classes), np.concatenate(tps), n_gt, names
+
+
+def pr_curve(scores, tp, n_gt):
+    """(thresholds, precision, recall), one point per prediction, by falling score."""
+    order = np.argsort(-scores)
+    tp_cum = np.cumsum(tp[order])
+    fp_cum = np.cumsum(~tp[order])
+    precision = tp_cum / np.maximum(tp_cum + fp_cum, 1)
+    recall = tp_cum / max(n_gt, 1)
+    return scores[order], precision, recall
+
+
+def pick_threshold(scores, tp, n_gt, target_precision=TARGET_PRECISION):
+    """Lowest threshold whose precision still reaches the target.
+
+    Falls back to the best-F1 point when the target is never reached.
+    Returns (threshold, precision, recall).
+    """
+    if not len(scores):
+        return 1.0, 0.0, 0.0
+    thresholds, precision, recall = pr_curve(scores, tp, n_gt)
+    ok = np.nonzero(precision >= target_precision)[0]
+    if len(ok):
+        k = ok[-1]
+    else:
+        f1 = 2 * precision * recall / np.maximum(precision + recall, 1e-9)
+        k = int(np.argmax(f1))
+    return float(thresholds[k]), float(precision[k]), float(recall[k])
+
+
+def _logit(p):
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    return np.log(p / (1 - p))
+
+
+def fit_temperature(scores, tp):
+    """Temperature T minimizing the log loss of sigmoid(logit(score) / T)."""
+    if len(scores) < 2 or tp.all() or not tp.any():
+        return 1.0
+    z = _logit(scores)
+    y = tp.astype(np.float64)
+
+    def nll(log_t):
+        p = np.clip(1 / (1 + np.exp(-z / math.exp(log_t))), 1e-9, 1 - 1e-9)
+        return -np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))
+
+    # Golden-section search over log T in [1/20, 20]
+    lo, hi = -3.0, 3.0
+    g = (math.sqrt(5) - 1) / 2
+    for _ in range(60):
+        a, b = hi - g * (hi - lo), lo + g * (hi - lo)
+        if nll(a) < nll(b):
+            hi = b
+        else:
+            lo = a
+    return float(math.exp((lo + hi) / 2))
+
+
+def calibrate(weights, data_yaml, target_precision=TARGET_PRECISION, temperature=False, imgsz=IMGSZ):
+    """Build the calibration dict written next to the model."""
+    scores, classes, tps, n_gt, names = collect_predictions(weights, data_yaml, imgsz)
+
+    per_class = []
+    for c, name in enumerate(names):
+        mask = classes == c
+        threshold, precision, recall = pick_threshold(scores[mask], tps[mask], n_gt[c], target_precision)
+        per_class.append({
+            'name': name,
+            'threshold': threshold,
+            'precision': precision,
+            'recall': recall,
+            'temperature': fit_temperature(scores[mask], tps[mask]) if temperature else 1.0,
+            'support': int(n_gt[c]),
+        })
+
+    return {
+        'targetPrecision': target_precision,
+        'iou': IOU_MATCH,
+        'imgsz': imgsz,
+        'classes': [c['name'] for c in per_class],
+        'thresholds': [c['threshold'] for c in per_class],
+        'temperatures': [c['temperature'] for c in per_class],
+        # Anything below this can be dropped before looking at class scores
+        'minThreshold': min((c['threshold'] for c in per_class), default=0.0),
+        'perClass': per_class,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-class threshold calibration")
+    parser.add_argument('weights')
+    parser.add_argument('data', nargs='?', default='data.yaml')
+    parser.add_argument('--precision', type=float, default=TARGET_PRECISION)
+    parser.add_argument('--temperature', action='store_true', help="also fit temperature scaling")
+    parser.add_argument('--imgsz', type=int, default=IMGSZ)
+    parser.add_argument('--output', help="default: <weights>.calibration.json")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Per-Class Threshold Calibration")
+    print("=" * 60)
+
+    for path in (args.weights, args.data):
+        if not os.path.exists(path):
+            print(f"❌ Not found: {path}")
+            sys.exit(1)
+
+    print(f"\n📊 Running {args.weights} on the validation split...")
+    try:
+        calibration = calibrate(args.weights, args.data, args.precision, args.temperature, args.imgsz)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"\n   Target precision: {args.precision:.2f}")
+    for c in calibration['perClass']:
+        print(f"   {c['name']:<20} threshold {c['threshold']:.3f}  "
+              f"P {c['precision']:.3f}  R {c['recall']:.3f}  T {c['temperature']:.2f}  "
+              f"({c['support']} objects)")
+
+    output = args.output or os.path.splitext(args.weights)[0] + '.calibration.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2)
+    print(f"\n✅ Calibration: {output}")
+
+    print("\n📋 Next:")
+    print("1. Copy it next to the model: public/models/yolov5.calibration.json")
+    print("2. Load it with useYOLOv5Detection:")
+    print("   calibrationPath: '/models/yolov5.calibration.json',")
+    print(f"   inputSize: {args.imgsz},  // thresholds were fitted at this size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,748 @@
+"""
+Sharded dataset format for YOLOv5 training.
+
+Instead of extracting the Roboflow zip into thousands of small files under
+train/images and train/labels (slow on network storage and NTFS), pack the
+image/label pairs into a few large uncompressed tar shards. With
+ShardedDetectionTrainer every DataLoader worker gets whole shards and reads
+each of them with one sequential read per epoch, instead of thousands of
+small-file opens.
+The original Roboflow zip can also be read directly (random access) without
+extracting it.
+
+Every dataset view is a directory with an index.json:
+  shards/train/index.json  + shard-00000.tar, shard-00001.tar, ...
+  zipview/train/index.json -> points into roboflow.zip
+
+Usage:
+1. Pack from the extracted folders or straight from the zip:
+     python dataset_shards.py pack data.yaml shards
+     python dataset_shards.py pack roboflow.zip shards
+   (or only index the zip without repacking it:
+     python dataset_shards.py index-zip roboflow.zip zipview)
+2. Train with the sharded trainer:
+     from ultralytics import YOLO
+     from dataset_shards import ShardedDetectionTrainer
+     model = YOLO('yolov5n.pt')
+     model.train(data='shards/data.yaml', trainer=ShardedDetectionTrainer, ...)
+"""
+
+import io
+import json
+import os
+import random
+import sys
+import tarfile
+import zipfile
+
+import yaml
+
+SHARD_SIZE = 1000
+INDEX_FILE = 'index.json'
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+SPLITS = {'train': 'train', 'val': 'valid', 'test': 'test'}
+
+
+def _image_shape(image_bytes):
+    """(height, width) from the image header without decoding pixels."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_bytes)) as im:
+        width, height = im.size
+    return height, width
+
+
+def _worker_info():
+    """(worker_id, num_workers) of the current DataLoader worker, or (0, 1)."""
+    try:
+        from torch.utils.data import get_worker_info
+    except ImportError:
+        return 0, 1
+    info = get_worker_info()
+    if info is None:
+        return 0, 1
+    return info.id, info.num_workers
+
+
+class FolderReader:
+    """Random-access reader over an extracted split (images/ + labels/)."""
+
+    def __init__(self, split_dir):
+        self.split_dir = split_dir
+        image_dir = os.path.join(split_dir, 'images')
+        self.files = sorted(
+            f for f in os.listdir(image_dir) if f.lower().endswith(IMAGE_EXTS)
+        )
+
+    def __len__(self):
+        return len(self.files)
+
+    def key(self, i):
+        return os.path.splitext(self.files[i])[0]
+
+    def ext(self, i):
+        return os.path.splitext(self.files[i])[1]
+
+    def read(self, i):
+        """Return (image_bytes, label_text) for sample i."""
+        with open(os.path.join(self.split_dir, 'images', self.files[i]), 'rb') as f:
+            image_bytes = f.read()
+        return image_bytes, self.read_label(i)
+
+    def read_label(self, i):
+        label_path = os.path.join(self.split_dir, 'labels', self.key(i) + '.txt')
+        if not os.path.exists(label_path):
+            return ''
+        with open(label_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def shape(self, i):
+        with open(os.path.join(self.split_dir, 'images', self.files[i]), 'rb') as f:
+            return _image_shape(f.read())
+
+    def groups(self):
+        return [list(range(len(self)))]
+
+
+class ZipReader:
+    """Random-access reader over one split of the original Roboflow zip.
+
+    The archive is opened lazily per process so the reader can be shared
+    with DataLoader workers.
+    """
+
+    def __init__(self, zip_path, split):
+        self.zip_path = os.path.abspath(zip_path)
+        self.split = split
+        self._zip = None
+        self._pid = None
+
+        with zipfile.ZipFile(self.zip_path) as zf:
+            names = set(zf.namelist())
+        prefix = self._find_prefix(names, split)
+        self.images = sorted(
+            n for n in names
+            if n.startswith(prefix + 'images/') and n.lower().endswith(IMAGE_EXTS)
+        )
+        self.labels = {}
+        for name in self.images:
+            stem = os.path.splitext(name[len(prefix + 'images/'):])[0]
+            label = prefix + 'labels/' + stem + '.txt'
+            self.labels[name] = label if label in names else None
+        self.shapes = None
+
+    @staticmethod
+    def _find_prefix(names, split):
+        """Roboflow zips put splits at the root or one folder down."""
+        for name in names:
+            parts = name.split('/')
+            if split in parts and parts[parts.index(split) + 1:][:1] == ['images']:
+                return '/'.join(parts[:parts.index(split) + 1]) + '/'
+        raise FileNotFoundError(f"No '{split}/images' folder in zip")
+
+    def _archive(self):
+        if self._zip is None or self._pid != os.getpid():
+            self._zip = zipfile.ZipFile(self.zip_path)
+            self._pid = os.getpid()
+        return self._zip
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_zip'] = None
+        state['_pid'] = None
+        return state
+
+    def __len__(self):
+        return len(self.images)
+
+    def key(self, i):
+        return os.path.splitext(os.path.basename(self.images[i]))[0]
+
+    def ext(self, i):
+        return os.path.splitext(self.images[i])[1]
+
+    def read(self, i):
+        """Return (image_bytes, label_text) for sample i."""
+        return self._archive().read(self.images[i]), self.read_label(i)
+
+    def read_label(self, i):
+        label = self.labels[self.images[i]]
+        return self._archive().read(label).decode('utf-8') if label else ''
+
+    def shape(self, i):
+        if self.shapes is None:
+            self.shapes = [_image_shape(self._archive().read(n)) for n in self.images]
+        return self.shapes[i]
+
+    def groups(self):
+        return [list(range(len(self)))]
+
+
+class ShardReader:
+    """Reader over a directory of tar shards written by write_shards().
+
+    read() gives random access (a seek and a small read per sample). With
+    whole_shards set, read() loads the sample's whole shard with one
+    sequential read and serves it from memory until another shard is needed
+    (one shard held per process); ShardBatchSampler makes that pay off by
+    keeping each DataLoader worker on its own shards. stream() is the same
+    idea for iterable pipelines.
+    """
+
+    whole_shards = False
+
+    def __init__(self, shard_dir):
+        self.shard_dir = os.path.abspath(shard_dir)
+        with open(os.path.join(self.shard_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.shard_files = [s['file'] for s in index['shards']]
+        # Flat sample list: (shard, key, ext, img_off, img_size, lbl_off, lbl_size, h, w)
+        self.samples = []
+        self._groups = []
+        for shard_id, shard in enumerate(index['shards']):
+            start = len(self.samples)
+            for entry in shard['samples']:
+                self.samples.append((shard_id, *entry))
+            self._groups.append(list(range(start, len(self.samples))))
+        self._handles = {}
+        self._blob = None
+        self._pid = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_handles'] = {}
+        state['_blob'] = None
+        state['_pid'] = None
+        return state
+
+    def __len__(self):
+        return len(self.samples)
+
+    def key(self, i):
+        return self.samples[i][1]
+
+    def ext(self, i):
+        return self.samples[i][2]
+
+    def shape(self, i):
+        return self.samples[i][7], self.samples[i][8]
+
+    def groups(self):
+        return self._groups
+
+    def _check_process(self):
+        if self._pid != os.getpid():
+            self._handles = {}
+            self._blob = None
+            self._pid = os.getpid()
+
+    def _handle(self, shard_id):
+        self._check_process()
+        if shard_id not in self._handles:
+            path = os.path.join(self.shard_dir, self.shard_files[shard_id])
+            self._handles[shard_id] = open(path, 'rb')
+        return self._handles[shard_id]
+
+    def read_shard(self, shard_id):
+        """Whole shard file as bytes (one sequential read)."""
+        with open(os.path.join(self.shard_dir, self.shard_files[shard_id]), 'rb') as f:
+            return f.read()
+
+    def _range(self, shard_id, offset, size):
+        if self.whole_shards:
+            self._check_process()
+            if self._blob is None or self._blob[0] != shard_id:
+                self._blob = None  # free the previous shard before reading the next
+                self._blob = (shard_id, self.read_shard(shard_id))
+            return self._blob[1][offset:offset + size]
+        f = self._handle(shard_id)
+        f.seek(offset)
+        return f.read(size)
+
+    def read(self, i):
+        """Return (image_bytes, label_text) for sample i."""
+        shard_id, _, _, img_off, img_size, _, _, _, _ = self.samples[i]
+        return self._range(shard_id, img_off, img_size), self.read_label(i)
+
+    def read_label(self, i):
+        shard_id, _, _, _, _, lbl_off, lbl_size, _, _ = self.samples[i]
+        return self._range(shard_id, lbl_off, lbl_size).decode('utf-8')
+
+    def stream(self, epoch=0, shuffle=True, seed=0):
+        """Yield (key, image_bytes, label_text) shard by shard.
+
+        Each DataLoader worker gets its own subset of shards, so no shard is
+        read twice per epoch.
+        """
+        worker_id, num_workers = _worker_info()
+        rng = random.Random(seed + epoch)
+        order = list(range(len(self.shard_files)))
+        if shuffle:
+            rng.shuffle(order)
+
+        for shard_id in order[worker_id::num_workers]:
+            blob = self.read_shard(shard_id)
+            members = list(self._groups[shard_id])
+            if shuffle:
+                rng.shuffle(members)
+            for i in members:
+                _, key, _, img_off, img_size, lbl_off, lbl_size, _, _ = self.samples[i]
+                yield (
+                    key,
+                    blob[img_off:img_off + img_size],
+                    blob[lbl_off:lbl_off + lbl_size].decode('utf-8'),
+                )
+
+
+def open_source(path):
+    """Open a dataset view directory (shards or zip index) or an extracted split."""
+    index_path = os.path.join(path, INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('format') == 'zip':
+            return ZipReader(index['archive'], index['split'])
+        return ShardReader(path)
+    if os.path.basename(os.path.normpath(path)) == 'images':
+        path = os.path.dirname(os.path.normpath(path))
+    return FolderReader(path)
+
+
+def write_shards(reader, output_dir, shard_size=SHARD_SIZE, seed=0):
+    """Pack every sample of reader into tar shards plus index.json.
+
+    Samples are shuffled once before packing so each shard has a class mix
+    and in-shard shuffling is enough during training.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    order = list(range(len(reader)))
+    random.Random(seed).shuffle(order)
+
+    shards = []
+    for shard_id, start in enumerate(range(0, len(order), shard_size)):
+        name = f'shard-{shard_id:05d}.tar'
+        path = os.path.join(output_dir, name)
+        shapes = []
+        with tarfile.open(path, 'w') as tar:
+            for i in order[start:start + shard_size]:
+                image_bytes, label_text = reader.read(i)
+                shapes.append(_image_shape(image_bytes))
+                key = reader.key(i)
+                for member, payload in (
+                    (key + reader.ext(i), image_bytes),
+                    (key + '.txt', label_text.encode('utf-8')),
+                ):
+                    info = tarfile.TarInfo(member)
+                    info.size = len(payload)
+                    tar.addfile(info, io.BytesIO(payload))
+
+        # Re-read the headers once to record where each payload starts.
+        with tarfile.open(path, 'r') as tar:
+            members = tar.getmembers()
+        samples = []
+        for image, label, (height, width) in zip(members[0::2], members[1::2], shapes):
+            key, ext = os.path.splitext(image.name)
+            samples.append([
+                key, ext,
+                image.offset_data, image.size,
+                label.offset_data, label.size,
+                height, width,
+            ])
+        shards.append({'file': name, 'samples': samples})
+
+    with open(os.path.join(output_dir, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'format': 'shards', 'shards': shards}, f)
+    return output_dir
+
+
+def write_zip_index(zip_path, output_dir, split):
+    """Write an index.json that serves one split straight from the zip."""
+    ZipReader(zip_path, split)  # fail early if the split is missing
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'format': 'zip',
+            'archive': os.path.abspath(zip_path),
+            'split': split,
+        }, f)
+    return output_dir
+
+
+def write_data_yaml(output_dir, names, splits):
+    """data.yaml whose train/val/test entries point at dataset view dirs."""
+    data = {'names': list(names), 'nc': len(names)}
+    for key, path in splits.items():
+        data[key] = os.path.abspath(path)
+    yaml_path = os.path.join(output_dir, 'data.yaml')
+    with open(yaml_path, 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, default_flow_style=False)
+    return yaml_path
+
+
+def _class_names(source):
+    """Class names from a data.yaml on disk or inside a Roboflow zip."""
+    if source.endswith('.zip'):
+        with zipfile.ZipFile(source) as zf:
+            for name in zf.namelist():
+                if os.path.basename(name) == 'data.yaml':
+                    return yaml.safe_load(zf.read(name)).get('names', [])
+        return []
+    with open(source, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f).get('names', [])
+
+
+def pack(source, output_dir, shard_size=SHARD_SIZE):
+    """Pack every split of a data.yaml dataset or a Roboflow zip into shards."""
+    base_dir = os.path.dirname(os.path.abspath(source))
+    splits = {}
+    for key, folder in SPLITS.items():
+        if source.endswith('.zip'):
+            try:
+                reader = ZipReader(source, folder)
+            except FileNotFoundError:
+                continue
+        else:
+            split_dir = os.path.join(base_dir, folder)
+            if not os.path.isdir(os.path.join(split_dir, 'images')):
+                continue
+            reader = FolderReader(split_dir)
+        print(f"   {folder}: {len(reader)} images")
+        splits[key] = write_shards(reader, os.path.join(output_dir, folder), shard_size)
+    return write_data_yaml(output_dir, _class_names(source), splits)
+
+
+def index_zip(zip_path, output_dir):
+    """Make the zip usable for training without extracting it."""
+    splits = {}
+    for key, folder in SPLITS.items():
+        try:
+            splits[key] = write_zip_index(zip_path, os.path.join(output_dir, folder), folder)
+        except FileNotFoundError:
+            continue
+    return write_data_yaml(output_dir, _class_names(zip_path), splits)
+
+
+# ============================================
+# ultralytics integration
+# ============================================
+
+try:
+    from ultralytics.data.dataset import YOLODataset
+    from ultralytics.models.yolo.detect import DetectionTrainer
+except ImportError:  # only needed for training
+    YOLODataset = object
+    DetectionTrainer = object
+
+
+def parse_label(label_text):
+    """YOLO label text -> (cls list, xywh list). Polygons become boxes."""
+    classes, boxes = [], []
+    for line in label_text.splitlines():
+        values = line.split()
+        if len(values) < 5:
+            continue
+        classes.append([float(values[0])])
+        coords = [float(v) for v in values[1:]]
+        if len(coords) == 4:
+            boxes.append(coords)
+        else:
+            xs, ys = coords[0::2], coords[1::2]
+            x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+            boxes.append([(x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0])
+    return classes, boxes
+
+
+class ShardedYOLODataset(YOLODataset):
+    """YOLODataset that reads images and labels from a dataset view
+    (tar shards or Roboflow zip) instead of individual files."""
+
+    def __init__(self, *args, **kwargs):
+        # Disk caching writes .npy files next to each image; there is no
+        # such place inside an archive.
+        if kwargs.get('cache') == 'disk':
+            kwargs['cache'] = 'ram'
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        """Paths are only names here; `fraction` keeps a prefix of the source
+        (whole shards, which are shuffled at packing time)."""
+        self.source = open_source(img_path)
+        root = os.path.abspath(img_path)
+        count = round(len(self.source) * getattr(self, 'fraction', 1.0))
+        files = [
+            os.path.join(root, self.source.key(i) + self.source.ext(i))
+            for i in range(count)
+        ]
+        # rect mode re-sorts im_files/labels; map back to source indices
+        self.source_index = {f: i for i, f in enumerate(files)}
+        return files
+
+    def get_labels(self):
+        import numpy as np
+
+        labels = []
+        for i in range(len(self.im_files)):
+            classes, boxes = parse_label(self.source.read_label(i))
+            labels.append({
+                'im_file': self.im_files[i],
+                'shape': self.source.shape(i),
+                'cls': np.array(classes, dtype=np.float32).reshape(-1, 1),
+                'bboxes': np.array(boxes, dtype=np.float32).reshape(-1, 4),
+                'segments': [],
+                'keypoints': None,
+                'normalized': True,
+                'bbox_format': 'xywh',
+            })
+        return labels
+
+    def check_cache_ram(self, safety_margin=0.5):
+        import psutil
+
+        b = sum(
+            h * w * 3 * (self.imgsz / max(h, w)) ** 2
+            for h, w in (self.source.shape(i) for i in range(len(self.source)))
+        )
+        return b * (1 + safety_margin) < psutil.virtual_memory().available
+
+    def check_cache_disk(self, safety_margin=0.5):
+        return False
+
+    def load_image(self, i, rect_mode=True):
+        """Same resizing and buffering as BaseDataset.load_image, but the
+        pixels come from the archive."""
+        import cv2
+        import numpy as np
+
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+
+        image_bytes, _ = self.source.read(self.source_index[self.im_files[i]])
+        im = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if im is None:
+            raise FileNotFoundError(f"Image Not Found {self.im_files[i]}")
+
+        h0, w0 = im.shape[:2]
+        if rect_mode:
+            r = self.imgsz / max(h0, w0)
+            if r != 1:
+                w, h = (min(round(w0 * r), self.imgsz), min(round(h0 * r), self.imgsz))
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif not (h0 == w0 == self.imgsz):
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+        if self.augment:
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                if self.cache != 'ram':
+                    self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+        return im, (h0, w0), im.shape[:2]
+
+
+def _dataset_groups(dataset):
+    """Source shard groups limited to the samples the dataset uses (`fraction`)."""
+    n = len(dataset.im_files)
+    groups = [[i for i in g if i < n] for g in dataset.source.groups()]
+    return [g for g in groups if g]
+
+
+class ShardSampler:
+    """Shard-local shuffling for map-style loaders.
+
+    Shard order and the order inside each shard are reshuffled every epoch,
+    but samples of one shard stay together, so consecutive batches (and the
+    worker that loads them) keep reading the same file.
+    """
+
+    def __init__(self, dataset, shuffle=True, seed=0):
+        self.groups = _dataset_groups(dataset)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __len__(self):
+        return sum(len(g) for g in self.groups)
+
+    def __iter__(self):
+        rng = random.Random(self.seed + self.epoch)
+        groups = [list(g) for g in self.groups]
+        if self.shuffle:
+            rng.shuffle(groups)
+            for g in groups:
+                rng.shuffle(g)
+        self.epoch += 1
+        for g in groups:
+            yield from g
+
+
+class ShardBatchSampler:
+    """Batches that keep every DataLoader worker on its own shards.
+
+    A map-style DataLoader hands batch k to worker k % num_workers. Each
+    epoch the (shuffled) shards are split across workers, balanced by sample
+    count, and batch k is built only from the shards of worker
+    k % num_workers. Together with ShardReader.whole_shards every worker
+    reads each of its shards once per epoch, start to end, and no shard is
+    read by two workers.
+
+    Every worker gets the same number of batches per epoch (short ones are
+    topped up with repeats from their last shard), so the round-robin stays
+    aligned across epochs of ultralytics' never-ending loader.
+    """
+
+    def __init__(self, dataset, batch_size, num_workers=0, shuffle=True, seed=0):
+        self.groups = _dataset_groups(dataset)
+        self.batch_size = batch_size
+        self.workers = max(1, min(num_workers, len(self.groups)))
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        loads = [sum(len(g) for g in shards) for shards in self._assign(self.groups)]
+        self.rounds = max(-(-load // batch_size) for load in loads)
+
+    def _assign(self, groups):
+        """Shards per worker: largest first to the least-loaded worker. Sizes
+        decide the loads, so the batch count is the same every epoch."""
+        workers = [[] for _ in range(self.workers)]
+        loads = [0] * self.workers
+        for g in sorted(groups, key=len, reverse=True):
+            w = loads.index(min(loads))
+            workers[w].append(g)
+            loads[w] += len(g)
+        return workers
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __len__(self):
+        return self.rounds * self.workers
+
+    def __iter__(self):
+        rng = random.Random(self.seed + self.epoch)
+        groups = [list(g) for g in self.groups]
+        if self.shuffle:
+            rng.shuffle(groups)
+            for g in groups:
+                rng.shuffle(g)
+        self.epoch += 1
+
+        per_worker = []
+        for shards in self._assign(groups):
+            samples = [i for g in shards for i in g]
+            batches = [samples[k:k + self.batch_size] for k in range(0, len(samples), self.batch_size)]
+            while len(batches) < self.rounds:
+                batches.append(rng.choices(shards[-1], k=self.batch_size))
+            per_worker.append(batches)
+
+        for r in range(self.rounds):
+            for batches in per_worker:
+                yield batches[r]
+
+
+class ShardedDetectionTrainer(DetectionTrainer):
+    """DetectionTrainer that reads train/val from shards or the zip.
+
+    Pass it to model.train(trainer=ShardedDetectionTrainer, data=...) with a
+    data.yaml written by `pack` or `index-zip`.
+    """
+
+    def build_dataset(self, img_path, mode='train', batch=None):
+        from ultralytics.utils import colorstr
+        from ultralytics.utils.torch_utils import de_parallel
+
+        gs = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        return ShardedYOLODataset(
+            img_path=img_path,
+            imgsz=self.args.imgsz,
+            batch_size=batch,
+            augment=mode == 'train',
+            hyp=self.args,
+            rect=self.args.rect or mode == 'val',
+            cache=self.args.cache or None,
+            single_cls=self.args.single_cls or False,
+            stride=gs,
+            pad=0.0 if mode == 'train' else 0.5,
+            prefix=colorstr(f"{mode}: "),
+            task=self.args.task,
+            classes=self.args.classes,
+            data=self.data,
+            fraction=self.args.fraction if mode == 'train' else 1.0,
+        )
+
+    def get_dataloader(self, dataset_path, batch_size=16, rank=0, mode='train'):
+        from ultralytics.data.build import InfiniteDataLoader, seed_worker
+        from ultralytics.utils.torch_utils import torch_distributed_zero_first
+
+        with torch_distributed_zero_first(rank):
+            dataset = self.build_dataset(dataset_path, mode, batch_size)
+        shuffle = mode == 'train' and not getattr(dataset, 'rect', False)
+        workers = self.args.workers if mode == 'train' else self.args.workers * 2
+        workers = min(os.cpu_count() or 1, batch_size if batch_size > 1 else 0, workers)
+
+        if shuffle and isinstance(dataset.source, ShardReader):
+            # Shard-per-worker: each worker reads its shards whole, once per epoch
+            dataset.source.whole_shards = True
+            batch_sampler = ShardBatchSampler(
+                dataset, batch_size, workers, shuffle=True, seed=self.args.seed,
+            )
+            return InfiniteDataLoader(
+                dataset=dataset,
+                batch_sampler=batch_sampler,
+                num_workers=min(workers, batch_sampler.workers),
+                pin_memory=True,
+                collate_fn=getattr(dataset, 'collate_fn', None),
+                worker_init_fn=seed_worker,
+            )
+
+        # Val (rect order) and zip/folder sources: random access per sample
+        return InfiniteDataLoader(
+            dataset=dataset,
+            batch_size=batch_size,
+            num_workers=workers,
+            sampler=ShardSampler(dataset, shuffle=shuffle, seed=self.args.seed),
+            pin_memory=True,
+            collate_fn=getattr(dataset, 'collate_fn', None),
+            worker_init_fn=seed_worker,
+        )
+
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ('pack', 'index-zip'):
+        print("Usage:")
+        print("  python dataset_shards.py pack <data.yaml | roboflow.zip> <output_dir>")
+        print("  python dataset_shards.py index-zip <roboflow.zip> <output_dir>")
+        sys.exit(1)
+
+    command, source, output_dir = sys.argv[1:4]
+
+    print("=" * 60)
+    print("Sharded Dataset Builder")
+    print("=" * 60)
+
+    if not os.path.exists(source):
+        print(f"❌ Not found: {source}")
+        sys.exit(1)
+
+    try:
+        if command == 'pack':
+            print(f"\n📦 Packing {source} into tar shards ({SHARD_SIZE} images each)...")
+            yaml_path = pack(source, output_dir)
+        else:
+            print(f"\n📦 Indexing {source} for direct reads...")
+            yaml_path = index_zip(source, output_dir)
+    except Exception as e:
+        print(f"❌ Failed: {e}")
+        sys.exit(1)
+
+    print(f"\n✅ Dataset config: {yaml_path}")
+    print("\n📋 Train with:")
+    print("   from dataset_shards import ShardedDetectionTrainer")
+    print(f"   model.train(data='{yaml_path}', trainer=ShardedDetectionTrainer, ...)")
+
+
+if __name__ == "__main__":
+    main()
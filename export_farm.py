@@ -0,0 +1,319 @@
+"""
+Export farm - build every release artifact in parallel.
+
+Instead of running model.export one format at a time (convert_to_onnx.py,
+convert_to_tfjs.py), this script plans the whole variant matrix and runs it
+across a process pool:
+
+  for each imgsz:
+    model.pt --> yolov5.onnx (FP32)  <- built once, everything below reuses it
+                   |-> yolov5.fp16.onnx
+                   |-> yolov5.int8.onnx
+                   |-> yolov5.ort        (optimize_onnx.py)
+                   |-> saved_model/ --> tfjs/
+
+Tasks start as soon as their inputs exist, so a release takes about as long
+as the slowest chain (ONNX -> SavedModel -> TF.js) instead of the sum of
+all exports. Each task gets its own memory cap (resident memory of the
+worker and its subprocesses, checked with psutil).
+
+Usage:
+    pip install ultralytics onnx onnxruntime onnxconverter-common onnx2tf tensorflowjs psutil
+    python export_farm.py yolov5nu.pt --imgsz 416 640 --workers 4 --max-memory-gb 6
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+DEFAULT_VARIANTS = ['onnx', 'fp16', 'int8', 'ort', 'tfjs']
+OUTPUT_DIR = 'release'
+MEMORY_POLL_INTERVAL = 0.5  # seconds
+
+
+# ============================================
+# Tasks (module level so worker processes can run them)
+# ============================================
+
+def export_onnx(weights, work_dir, imgsz):
+    """FP32 ONNX export; the shared input of every other variant."""
+    from ultralytics import YOLO
+
+    os.makedirs(work_dir, exist_ok=True)
+    local = os.path.join(work_dir, 'yolov5.pt')
+    shutil.copy2(weights, local)
+    exported = YOLO(local).export(format='onnx', imgsz=imgsz)
+    os.remove(local)
+    return str(exported)
+
+
+def convert_fp16(onnx_path, work_dir):
+    import onnx
+    from onnxconverter_common import float16
+
+    target = os.path.join(work_dir, 'yolov5.fp16.onnx')
+    model = float16.convert_float_to_float16(onnx.load(onnx_path), keep_io_types=True)
+    onnx.save(model, target)
+    return target
+
+
+def quantize_int8(onnx_path, work_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    target = os.path.join(work_dir, 'yolov5.int8.onnx')
+    quantize_dynamic(onnx_path, target, weight_type=QuantType.QUInt8)
+    return target
+
+
+def optimize_ort(onnx_path, work_dir):
+    from optimize_onnx import optimize_model
+
+    return optimize_model(onnx_path, work_dir)['ort']
+
+
+def convert_saved_model(onnx_path, work_dir):
+    """ONNX -> TF SavedModel with onnx2tf (what ultralytics does internally)."""
+    target = os.path.join(work_dir, 'saved_model')
+    subprocess.run(
+        ['onnx2tf', '-i', onnx_path, '-o', target, '-nuo', '--non_verbose'],
+        check=True, capture_output=True,
+    )
+    return target
+
+
+def convert_tfjs(saved_model_dir, work_dir):
+    target = os.path.join(work_dir, 'tfjs')
+    subprocess.run([
+        'tensorflowjs_converter',
+        '--input_format=tf_saved_model',
+        '--output_format=tfjs_graph_model',
+        saved_model_dir, target,
+    ], check=True, capture_output=True)
+    return target
+
+
+# ============================================
+# Planning and scheduling
+# ============================================
+
+class Task:
+    """One export step. deps name the tasks whose outputs it consumes."""
+
+    def __init__(self, name, fn, args, deps=()):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.deps = list(deps)
+
+
+def plan(weights, imgsz_list, variants, output_dir=OUTPUT_DIR):
+    """Build the task graph for every (imgsz, variant) pair.
+
+    Intermediates (FP32 ONNX, SavedModel) appear once per imgsz no matter how
+    many variants need them.
+    """
+    tasks = []
+    for imgsz in imgsz_list:
+        work_dir = os.path.abspath(os.path.join(output_dir, str(imgsz)))
+        onnx = f'onnx@{imgsz}'
+        tasks.append(Task(onnx, export_onnx, (os.path.abspath(weights), work_dir, imgsz)))
+        if 'fp16' in variants:
+            tasks.append(Task(f'fp16@{imgsz}', convert_fp16, (work_dir,), [onnx]))
+        if 'int8' in variants:
+            tasks.append(Task(f'int8@{imgsz}', quantize_int8, (work_dir,), [onnx]))
+        if 'ort' in variants:
+            tasks.append(Task(f'ort@{imgsz}', optimize_ort, (work_dir,), [onnx]))
+        if 'tfjs' in variants:
+            saved = f'saved_model@{imgsz}'
+            tasks.append(Task(saved, convert_saved_model, (work_dir,), [onnx]))
+            tasks.append(Task(f'tfjs@{imgsz}', convert_tfjs, (work_dir,), [saved]))
+    return tasks
+
+
+class _MemoryWatchdog:
+    """Polls the resident memory of this worker and its subprocesses.
+
+    An address-space limit (RLIMIT_AS) would be the simpler cap, but torch
+    and TensorFlow reserve far more virtual memory than they use, so a
+    realistic limit kills the SavedModel/TF.js conversions. Over the cap the
+    watchdog kills the subprocesses (subprocess.run then fails) or, if the
+    work is in-process, interrupts the worker's main thread.
+    """
+
+    def __init__(self, max_bytes):
+        import psutil
+
+        self.max_bytes = max_bytes
+        self.exceeded = False
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def _rss(self):
+        import psutil
+
+        total = self._process.memory_info().rss
+        children = self._process.children(recursive=True)
+        for child in children:
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total, children
+
+    def _watch(self):
+        import _thread
+        import psutil
+
+        while not self._stop.wait(MEMORY_POLL_INTERVAL):
+            rss, children = self._rss()
+            if rss <= self.max_bytes:
+                continue
+            self.exceeded = True
+            if children:
+                for child in children:
+                    try:
+                        child.kill()
+                    except psutil.Error:
+                        pass
+            else:
+                _thread.interrupt_main()
+            return
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _run_task(fn, args, max_bytes=None):
+    watchdog = _MemoryWatchdog(max_bytes) if max_bytes else None
+    start = time.perf_counter()
+    try:
+        output = fn(*args)
+    except BaseException:
+        if watchdog and watchdog.exceeded:
+            raise MemoryError(f"over the {max_bytes / 1024 ** 3:.1f} GB memory cap") from None
+        raise
+    finally:
+        if watchdog:
+            watchdog.stop()
+    return output, time.perf_counter() - start
+
+
+def run(tasks, workers, max_memory_gb=None):
+    """Run the task graph, submitting each task as soon as its deps finish.
+
+    A task's first argument is the output of its first dependency.
+    Returns {name: {'output', 'seconds'} or {'error'}}.
+    """
+    max_bytes = int(max_memory_gb * 1024 ** 3) if max_memory_gb else None
+    if max_bytes:
+        try:
+            import psutil  # noqa: F401
+        except ImportError:
+            print("   ⚠️  psutil not installed - running without a memory cap (pip install psutil)")
+            max_bytes = None
+    pending = {t.name: t for t in tasks}
+    results = {}
+    running = {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as pool:
+        while pending or running:
+            for name, task in list(pending.items()):
+                if any(d not in results for d in task.deps):
+                    continue
+                del pending[name]
+                failed = [d for d in task.deps if 'error' in results[d]]
+                if failed:
+                    results[name] = {'error': f"skipped, {failed[0]} failed"}
+                    continue
+                args = task.args
+                if task.deps:
+                    args = (results[task.deps[0]]['output'],) + args
+                running[pool.submit(_run_task, task.fn, args, max_bytes)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    output, seconds = future.result()
+                    results[name] = {'output': output, 'seconds': seconds}
+                    print(f"   ✅ {name:<20} {seconds:7.1f}s  {output}")
+                except Exception as e:
+                    results[name] = {'error': str(e)}
+                    print(f"   ❌ {name:<20} {e}")
+    return results
+
+
+def critical_path(tasks, results):
+    """Longest dependency chain in seconds - the best possible wall time."""
+    by_name = {t.name: t for t in tasks}
+    memo = {}
+
+    def finish(name):
+        if name not in memo:
+            own = results.get(name, {}).get('seconds', 0.0)
+            memo[name] = own + max((finish(d) for d in by_name[name].deps), default=0.0)
+        return memo[name]
+
+    return max((finish(t.name) for t in tasks), default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build all release export variants in parallel")
+    parser.add_argument('weights', nargs='?', default='yolov5nu.pt')
+    parser.add_argument('--imgsz', type=int, nargs='+', default=[416, 640])
+    parser.add_argument('--variants', nargs='+', default=DEFAULT_VARIANTS, choices=DEFAULT_VARIANTS)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--max-memory-gb', type=float, default=None,
+                        help="resident memory cap per task, subprocesses included (needs psutil)")
+    parser.add_argument('--output', default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Export Farm")
+    print("=" * 60)
+
+    if not os.path.exists(args.weights):
+        print(f"❌ Model not found: {args.weights}")
+        sys.exit(1)
+
+    tasks = plan(args.weights, args.imgsz, args.variants, args.output)
+    print(f"\n📋 {len(tasks)} tasks for imgsz {args.imgsz}: {', '.join(t.name for t in tasks)}")
+    print(f"   {args.workers} workers"
+          + (f", {args.max_memory_gb} GB each" if args.max_memory_gb else ""))
+
+    start = time.perf_counter()
+    results = run(tasks, args.workers, args.max_memory_gb)
+    wall = time.perf_counter() - start
+
+    serial = sum(r.get('seconds', 0.0) for r in results.values())
+    print(f"\n⏱️  Wall time:      {wall:7.1f}s")
+    print(f"   Critical path:  {critical_path(tasks, results):7.1f}s")
+    print(f"   Serial total:   {serial:7.1f}s")
+
+    manifest = os.path.join(args.output, 'manifest.json')
+    os.makedirs(args.output, exist_ok=True)
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump({'weights': args.weights, 'wall_seconds': wall, 'tasks': results}, f, indent=2)
+    print(f"\n✅ Manifest: {manifest}")
+
+    if any('error' in r for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
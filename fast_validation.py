@@ -0,0 +1,285 @@
+"""
+Faster validation for CPU training runs.
+
+By default ultralytics validates on the whole valid/ split after every epoch,
+which is a large share of a 1-3 hour CPU run. This module adds:
+  - validation every N epochs instead of every epoch
+  - a fixed stratified subset of valid/ (built from the class histogram)
+    for the in-between checks
+  - a full validation whenever the subset score is a new best, and at the end
+  - all validation runs in a separate process on a checkpoint snapshot, so
+    training never waits for it
+
+Usage:
+    from ultralytics import YOLO
+    from fast_validation import build_val_subset, cadence_trainer
+
+    subset_yaml = build_val_subset('data.yaml', fraction=0.25)
+    model = YOLO('yolov5n.pt')
+    model.train(data='data.yaml', epochs=70,
+                trainer=cadence_trainer(val_every=5, subset_yaml=subset_yaml))
+
+The validation worker is a spawned process, which imports the training
+script again as __mp_main__. The script must keep its work under
+`if __name__ == "__main__":` (see train_fast.py), or the worker starts a
+second training run. If the worker dies anyway, validation falls back to
+the normal synchronous validation in the training process.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import yaml
+
+from dataset_shards import FolderReader, open_source
+
+try:
+    from ultralytics.models.yolo.detect import DetectionTrainer
+    from ultralytics.utils import LOGGER
+except ImportError:  # only needed for training
+    DetectionTrainer = object
+    LOGGER = None
+
+VAL_EVERY = 5
+SUBSET_FRACTION = 0.25
+MIN_PER_CLASS = 20
+
+
+def build_val_subset(data_yaml, fraction=SUBSET_FRACTION, min_per_class=MIN_PER_CLASS, seed=0):
+    """Write a stratified subset of the val split and a data.yaml that uses it.
+
+    Every class keeps at least `fraction` of the images it appears in (and no
+    fewer than min_per_class), rarest classes first, so small classes are not
+    drowned out. Returns the path of the subset data.yaml.
+    """
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    reader = open_source(data['val'])
+    if not isinstance(reader, FolderReader):
+        raise ValueError("Validation subsets need an extracted valid/ folder")
+
+    by_class = {}
+    background = []
+    for i in range(len(reader)):
+        classes = {int(line.split()[0]) for line in reader.read_label(i).splitlines() if line.strip()}
+        if not classes:
+            background.append(i)
+        for c in classes:
+            by_class.setdefault(c, []).append(i)
+
+    rng = random.Random(seed)
+    selected = set()
+    for c, images in sorted(by_class.items(), key=lambda item: len(item[1])):
+        quota = min(len(images), max(min_per_class, math.ceil(fraction * len(images))))
+        have = sum(1 for i in images if i in selected)
+        candidates = [i for i in images if i not in selected]
+        rng.shuffle(candidates)
+        selected.update(candidates[:max(0, quota - have)])
+    rng.shuffle(background)
+    selected.update(background[:math.ceil(fraction * len(background))])
+
+    base = os.path.splitext(os.path.abspath(data_yaml))[0]
+    list_path = base + '_val_subset.txt'
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for i in sorted(selected):
+            f.write(os.path.join(os.path.abspath(reader.split_dir), 'images', reader.files[i]) + '\n')
+
+    data['val'] = list_path
+    subset_yaml = base + '_val_subset.yaml'
+    with open(subset_yaml, 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, default_flow_style=False)
+    return subset_yaml
+
+
+def _validate_snapshot(snapshot, data, imgsz, batch, device):
+    """Runs in the validation worker process."""
+    from ultralytics import YOLO
+
+    start = time.perf_counter()
+    metrics = YOLO(snapshot).val(
+        data=data, imgsz=imgsz, batch=batch, device=device,
+        plots=False, save_json=False, verbose=False,
+    )
+    results = {k: float(v) for k, v in metrics.results_dict.items()}
+    results.pop('fitness', None)  # BaseTrainer.validate pops it too; not a results.csv column
+    return {
+        'fitness': float(metrics.fitness),
+        'metrics': results,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+class _CadenceMixin:
+    """Replaces the per-epoch synchronous validation of a DetectionTrainer.
+
+    validate() only snapshots the weights and queues a job; results are
+    picked up on later epochs. best.pt is chosen from full validations only.
+    """
+
+    val_every = VAL_EVERY
+    subset_yaml = None
+
+    def _init_cadence(self):
+        self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        self._jobs = []  # (future, kind, epoch, snapshot)
+        self._best_subset = -math.inf
+        self._best_epoch = 0
+        self._blocked = 0.0
+        self._full_seconds = []
+        self.best_fitness = -math.inf  # keeps BaseTrainer.save_model from writing best.pt
+
+    def _drop_pool(self, error):
+        """The worker died: validate in the training process from now on."""
+        if self._pool is not None:
+            LOGGER.warning(f"Background validation stopped ({error}); validating synchronously")
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _submit(self, kind, epoch, snapshot):
+        """Queue a validation job; returns False if there is no worker to run it."""
+        if self._pool is None:
+            return False
+        data = self.subset_yaml if kind == 'subset' else self.args.data
+        try:
+            future = self._pool.submit(
+                _validate_snapshot, snapshot, data, self.args.imgsz, self.batch_size * 2, self.args.device,
+            )
+        except BrokenProcessPool as e:
+            self._drop_pool(e)
+            return False
+        self._jobs.append((future, kind, epoch, snapshot))
+        return True
+
+    def _collect(self, block=False):
+        """Handle finished jobs; with block=True wait for all of them."""
+        while self._jobs:
+            done = [job for job in self._jobs if block or job[0].done()]
+            if not done:
+                return
+            for job in done:
+                self._jobs.remove(job)
+                future, kind, epoch, snapshot = job
+                keep = False
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    self._drop_pool(e)
+                    result = None
+                except Exception as e:
+                    LOGGER.warning(f"Validation of epoch {epoch} failed: {e}")
+                    result = None
+
+                if result and kind == 'subset' and result['fitness'] > self._best_subset:
+                    self._best_subset = result['fitness']
+                    keep = self._submit('full', epoch, snapshot)
+                elif result and kind == 'full':
+                    self._full_seconds.append(result['seconds'])
+                    # Same keys as the results.csv header written on the first epoch
+                    self.metrics = {k: result['metrics'].get(k, v) for k, v in self.metrics.items()}
+                    if result['fitness'] > self.best_fitness:
+                        self.best_fitness = result['fitness']
+                        self._best_epoch = epoch
+                        shutil.copy2(snapshot, self.best)
+                        LOGGER.info(f"New best (epoch {epoch}): fitness {result['fitness']:.4f}")
+                if not keep and os.path.exists(snapshot):
+                    os.remove(snapshot)
+
+    def validate(self):
+        if not hasattr(self, '_pool'):
+            self._init_cadence()
+        start = time.perf_counter()
+        epoch = self.epoch + 1
+
+        self._collect()
+        if self._best_epoch and epoch - self._best_epoch >= self.args.patience:
+            LOGGER.info(f"Stopping early: no improvement since epoch {self._best_epoch}")
+            self.stop = True
+
+        final = epoch >= self.epochs or self.stop
+        if final or epoch % self.val_every == 0:
+            if self._pool is not None:
+                self.save_model()
+                snapshot = os.path.join(self.wdir, f'val_epoch{epoch}.pt')
+                shutil.copy2(self.last, snapshot)
+                if not self._submit('subset' if self.subset_yaml and not final else 'full', epoch, snapshot):
+                    os.remove(snapshot)
+            if self._pool is None:
+                metrics, fitness = super().validate()
+                self._blocked += time.perf_counter() - start
+                return metrics, fitness
+
+        self._blocked += time.perf_counter() - start
+        # No fitness this epoch: the stopper and best.pt logic skip it.
+        return self.metrics, None
+
+    def final_eval(self):
+        if hasattr(self, '_pool'):
+            start = time.perf_counter()
+            self._collect(block=True)
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._blocked += time.perf_counter() - start
+            self._report()
+        super().final_eval()
+
+    def _report(self):
+        epochs = self.epoch + 1
+        if not self._full_seconds:
+            return
+        full = sum(self._full_seconds) / len(self._full_seconds)
+        LOGGER.info(
+            f"Validation time on the training path: {self._blocked:.1f}s "
+            f"(full validation every epoch would have cost ~{full * epochs:.1f}s, "
+            f"saved ~{full * epochs - self._blocked:.1f}s)"
+        )
+
+
+def cadence_trainer(val_every=VAL_EVERY, subset_yaml=None, base=DetectionTrainer):
+    """Trainer class for model.train(trainer=...) with the given cadence.
+
+    Snapshots are validated with YOLO(...).val(), i.e. the stock YOLODataset
+    on image folders, so base must be a plain DetectionTrainer; shard or zip
+    datasets (dataset_shards.ShardedDetectionTrainer) are not supported.
+    """
+    if base is not DetectionTrainer:
+        raise ValueError(
+            f"cadence_trainer validates with the stock YOLODataset; "
+            f"{getattr(base, '__name__', base)} is not supported"
+        )
+    return type(
+        'CadenceDetectionTrainer',
+        (_CadenceMixin, base),
+        {'val_every': val_every, 'subset_yaml': subset_yaml},
+    )
+
+
+def main():
+    data_yaml = sys.argv[1] if len(sys.argv) > 1 else 'data.yaml'
+    fraction = float(sys.argv[2]) if len(sys.argv) > 2 else SUBSET_FRACTION
+
+    print("=" * 60)
+    print("Stratified Validation Subset")
+    print("=" * 60)
+
+    if not os.path.exists(data_yaml):
+        print(f"❌ {data_yaml} not found!")
+        sys.exit(1)
+
+    subset_yaml = build_val_subset(data_yaml, fraction)
+    with open(subset_yaml, 'r', encoding='utf-8') as f:
+        list_path = yaml.safe_load(f)['val']
+    with open(list_path, 'r', encoding='utf-8') as f:
+        count = sum(1 for _ in f)
+    print(f"✅ {count} validation images ({fraction:.0%} per class, min {MIN_PER_CLASS})")
+    print(f"✅ Subset config: {subset_yaml}")
+
+
+if __name__ == "__main__":
+    main()
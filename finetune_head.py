@@ -0,0 +1,376 @@
+"""
+Fast fine-tuning on a new classroom's data - frozen backbone, cached features.
+
+Routine refreshes don't need to update the whole yolov5n network every epoch.
+This script:
+1. Freezes the backbone and runs it ONCE over the dataset (letterboxed, no
+   random augmentation; optionally a fixed horizontal flip)
+2. Caches the multi-scale feature maps the neck reads in memory-mapped
+   .npy files (float16)
+3. Trains only the neck/head against the cache, so an epoch skips image
+   decoding, augmentation and the backbone entirely
+4. Saves a normal ultralytics checkpoint, validates it against the original
+   weights and exports it through the usual ONNX path (copied into
+   public/models/ only with --install)
+
+Cache size is roughly 0.6 MB per image at imgsz 416 (x2 with --flip).
+
+Usage:
+    python finetune_head.py runs/detect/distraction_detector/weights/best.pt data.yaml
+    python finetune_head.py best.pt data.yaml --epochs 30 --flip --install
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import yaml
+
+from dataset_shards import open_source, parse_label
+
+IMGSZ = 416
+EPOCHS = 20
+BATCH = 32
+LR = 0.001
+CACHE_DIR = 'feature_cache'
+
+
+def letterbox(im, imgsz):
+    """Resize keeping aspect ratio and pad to imgsz x imgsz (gray 114).
+
+    Returns the padded image and (scale_w, scale_h, pad_left, pad_top) as
+    fractions of imgsz, for mapping normalized labels.
+    """
+    import cv2
+
+    h0, w0 = im.shape[:2]
+    r = imgsz / max(h0, w0)
+    nh, nw = round(h0 * r), round(w0 * r)
+    im = cv2.resize(im, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top, left = (imgsz - nh) // 2, (imgsz - nw) // 2
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[top:top + nh, left:left + nw] = im
+    return canvas, (nw / imgsz, nh / imgsz, left / imgsz, top / imgsz)
+
+
+def split_layers(model):
+    """(number of backbone layers, backbone layers the neck reads from)."""
+    nb = len(model.yaml['backbone'])
+    needed = {nb - 1}
+    for m in model.model[nb:]:
+        for f in ([m.f] if isinstance(m.f, int) else m.f):
+            if f != -1 and f < nb:
+                needed.add(f)
+    return nb, sorted(needed)
+
+
+def _run_layers(layers, x, y):
+    """Same routing as DetectionModel._predict_once, keeping every output."""
+    for m in layers:
+        if m.f != -1:
+            x = y[m.f] if isinstance(m.f, int) else [x if j == -1 else y[j] for j in m.f]
+        x = m(x)
+        y.append(x)
+    return x
+
+
+def backbone_forward(model, img):
+    nb, needed = split_layers(model)
+    y = []
+    _run_layers(model.model[:nb], img, y)
+    return {j: y[j] for j in needed}
+
+
+def head_forward(model, feats):
+    nb, _ = split_layers(model)
+    y = [feats.get(j) for j in range(nb)]
+    return _run_layers(model.model[nb:], feats[nb - 1], y)
+
+
+def cache_features(model, reader, cache_dir=CACHE_DIR, imgsz=IMGSZ, flip=False, batch=BATCH, weights=None):
+    """Run the frozen backbone once over reader and write the feature cache.
+
+    weights is the .pt the model was loaded from; it is recorded so that
+    stale_cache() can tell whether the cache still belongs to it.
+    """
+    import cv2
+    import torch
+
+    model.eval()
+    nb, needed = split_layers(model)
+    views = [False, True] if flip else [False]
+    count = len(reader) * len(views)
+
+    with torch.no_grad():
+        probe = backbone_forward(model, torch.zeros(1, 3, imgsz, imgsz))
+    os.makedirs(cache_dir, exist_ok=True)
+    stores = {
+        j: np.lib.format.open_memmap(
+            os.path.join(cache_dir, f'layer{j}.npy'), mode='w+',
+            dtype=np.float16, shape=(count, *probe[j].shape[1:]),
+        )
+        for j in needed
+    }
+
+    classes, boxes, offsets = [], [], [0]
+    pending, row = [], 0
+
+    def flush():
+        nonlocal row
+        with torch.no_grad():
+            feats = backbone_forward(model, torch.from_numpy(np.stack(pending)))
+        for j in needed:
+            stores[j][row:row + len(pending)] = feats[j].numpy().astype(np.float16)
+        row += len(pending)
+        pending.clear()
+
+    for i in range(len(reader)):
+        image_bytes, label_text = reader.read(i)
+        im = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        im, (sw, sh, px, py) = letterbox(im, imgsz)
+        cls, xywh = parse_label(label_text)
+        xywh = np.array(xywh, dtype=np.float32).reshape(-1, 4)
+        xywh = xywh * [sw, sh, sw, sh] + [px, py, 0, 0]
+
+        for flipped in views:
+            view = im[:, ::-1] if flipped else im
+            view_boxes = xywh.copy()
+            if flipped:
+                view_boxes[:, 0] = 1 - view_boxes[:, 0]
+            pending.append(np.ascontiguousarray(view[:, :, ::-1].transpose(2, 0, 1)) / np.float32(255))
+            classes.extend(c[0] for c in cls)
+            boxes.append(view_boxes)
+            offsets.append(offsets[-1] + len(cls))
+            if len(pending) == batch:
+                flush()
+    if pending:
+        flush()
+
+    for store in stores.values():
+        store.flush()
+    np.savez(
+        os.path.join(cache_dir, 'labels.npz'),
+        cls=np.array(classes, dtype=np.float32),
+        bboxes=np.concatenate(boxes) if boxes else np.zeros((0, 4), np.float32),
+        offsets=np.array(offsets, dtype=np.int64),
+    )
+    with open(os.path.join(cache_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'imgsz': imgsz, 'count': count, 'layers': needed, 'flip': flip,
+            'weights': os.path.abspath(weights) if weights else None,
+            'mtime': os.path.getmtime(weights) if weights else None,
+        }, f)
+    return cache_dir
+
+
+def stale_cache(cache_dir, weights, imgsz, layers, flip):
+    """Settings that differ between the cache in cache_dir and this run ([] = reusable)."""
+    path = os.path.join(cache_dir, 'meta.json')
+    if not os.path.exists(path):
+        return ['no meta.json']
+    with open(path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    expected = {
+        'imgsz': imgsz, 'layers': list(layers), 'flip': flip,
+        'weights': os.path.abspath(weights), 'mtime': os.path.getmtime(weights),
+    }
+    return [k for k, v in expected.items() if meta.get(k) != v]
+
+
+class FeatureCache:
+    """Memory-mapped view of a cache written by cache_features()."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.layers = {
+            j: np.load(os.path.join(cache_dir, f'layer{j}.npy'), mmap_mode='r')
+            for j in self.meta['layers']
+        }
+        labels = np.load(os.path.join(cache_dir, 'labels.npz'))
+        self.cls, self.bboxes, self.offsets = labels['cls'], labels['bboxes'], labels['offsets']
+
+    def __len__(self):
+        return self.meta['count']
+
+    def batch(self, indices):
+        """(features {layer: tensor}, ultralytics loss batch) for indices."""
+        import torch
+
+        indices = np.sort(indices)  # sequential reads from the memmaps
+        feats = {j: torch.from_numpy(store[indices].astype(np.float32)) for j, store in self.layers.items()}
+        batch_idx, cls, bboxes = [], [], []
+        for k, i in enumerate(indices):
+            s, e = self.offsets[i], self.offsets[i + 1]
+            batch_idx.append(np.full(e - s, k, dtype=np.float32))
+            cls.append(self.cls[s:e])
+            bboxes.append(self.bboxes[s:e])
+        batch = {
+            'batch_idx': torch.from_numpy(np.concatenate(batch_idx)),
+            'cls': torch.from_numpy(np.concatenate(cls)).view(-1, 1),
+            'bboxes': torch.from_numpy(np.concatenate(bboxes)),
+        }
+        return feats, batch
+
+
+def train_head(model, cache, epochs=EPOCHS, batch=BATCH, lr=LR, seed=0):
+    """Train the layers after the backbone on cached features.
+
+    Returns the list of epoch times in seconds.
+    """
+    import torch
+    from ultralytics.cfg import get_cfg
+
+    nb, _ = split_layers(model)
+    for i, m in enumerate(model.model):
+        m.requires_grad_(i >= nb)
+    model.args = get_cfg()  # loss gains (box, cls, dfl)
+    model.criterion = None
+
+    params = [p for p in model.model[nb:].parameters()]
+    optimizer = torch.optim.AdamW(params, lr=lr, weight_decay=5e-4)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, epochs, eta_min=lr * 0.01)
+    rng = np.random.default_rng(seed)
+
+    epoch_times = []
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        model.train()
+        order = rng.permutation(len(cache))
+        total = 0.0
+        for s in range(0, len(order), batch):
+            feats, targets = cache.batch(order[s:s + batch])
+            preds = head_forward(model, feats)
+            loss, loss_items = model.loss(targets, preds)
+            optimizer.zero_grad()
+            loss.sum().backward()
+            torch.nn.utils.clip_grad_norm_(params, max_norm=10.0)
+            optimizer.step()
+            total += float(loss_items.sum())
+        scheduler.step()
+        epoch_times.append(time.perf_counter() - start)
+        print(f"   Epoch {epoch + 1}/{epochs}: loss {total / max(1, len(order) // batch):.4f}"
+              f" ({epoch_times[-1]:.1f}s)")
+    return epoch_times
+
+
+def save_checkpoint(model, path, data_yaml, imgsz):
+    """Checkpoint that YOLO(path) and model.export() load like any best.pt."""
+    from copy import deepcopy
+
+    import torch
+
+    train_args = {'data': data_yaml, 'imgsz': imgsz, 'task': 'detect'}
+    model.eval()
+    saved = deepcopy(model).half()
+    # train_head attached the loss object and a get_cfg() namespace; don't pickle them
+    saved.criterion = None
+    saved.args = dict(train_args)
+    torch.save({
+        'epoch': -1,
+        'best_fitness': None,
+        'model': saved,
+        'ema': None,
+        'optimizer': None,
+        'train_args': train_args,
+    }, path)
+    return path
+
+
+def validate(weights, data_yaml, imgsz):
+    """(mAP50, mAP50-95) on the val split."""
+    from ultralytics import YOLO
+
+    metrics = YOLO(weights).val(data=data_yaml, imgsz=imgsz, plots=False, verbose=False)
+    return float(metrics.box.map50), float(metrics.box.map)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fine-tune the neck/head on cached backbone features")
+    parser.add_argument('weights')
+    parser.add_argument('data', nargs='?', default='data.yaml')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--imgsz', type=int, default=IMGSZ)
+    parser.add_argument('--batch', type=int, default=BATCH)
+    parser.add_argument('--flip', action='store_true', help="also cache horizontally flipped images")
+    parser.add_argument('--cache', default=CACHE_DIR)
+    parser.add_argument('--reuse-cache', action='store_true')
+    parser.add_argument('--install', action='store_true',
+                        help="copy the ONNX model to public/models/yolov5.onnx if it validates no worse")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Frozen-Backbone Fine-Tuning")
+    print("=" * 60)
+
+    for path in (args.weights, args.data):
+        if not os.path.exists(path):
+            print(f"❌ Not found: {path}")
+            sys.exit(1)
+
+    from ultralytics import YOLO
+
+    model = YOLO(args.weights).model.float()
+    with open(args.data, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+
+    nb, needed = split_layers(model)
+    print(f"✅ Backbone: layers 0-{nb - 1} (frozen), caching outputs of layers {needed}")
+
+    stale = stale_cache(args.cache, args.weights, args.imgsz, needed, args.flip) if args.reuse_cache else []
+    if stale:
+        print(f"⚠️  Feature cache does not match this run ({', '.join(stale)}); rebuilding it")
+    if not args.reuse_cache or stale:
+        print("\n[1/4] Running the backbone once over the training set...")
+        start = time.perf_counter()
+        cache_features(
+            model, open_source(data['train']), args.cache, args.imgsz, args.flip, args.batch, args.weights,
+        )
+        print(f"✅ Cached in {time.perf_counter() - start:.1f}s → {args.cache}/")
+    else:
+        print(f"\n[1/4] Reusing feature cache: {args.cache}/")
+
+    print("\n[2/4] Training neck/head...")
+    epoch_times = train_head(model, FeatureCache(args.cache), args.epochs, args.batch)
+    print(f"✅ Mean epoch time: {sum(epoch_times) / len(epoch_times):.1f}s")
+
+    ckpt = save_checkpoint(
+        model, os.path.splitext(args.weights)[0] + '_finetuned.pt', os.path.abspath(args.data), args.imgsz,
+    )
+    print(f"✅ Fine-tuned model: {ckpt}")
+
+    print("\n[3/4] Validating against the original weights...")
+    try:
+        before = validate(args.weights, args.data, args.imgsz)
+        after = validate(ckpt, args.data, args.imgsz)
+    except Exception as e:
+        print(f"❌ Validation failed: {e}")
+        sys.exit(1)
+    print(f"   Original:   mAP50 {before[0]:.3f}  mAP50-95 {before[1]:.3f}")
+    print(f"   Fine-tuned: mAP50 {after[0]:.3f}  mAP50-95 {after[1]:.3f}")
+    improved = after[1] >= before[1]
+    if not improved:
+        print("⚠️  The fine-tuned model is worse on the val split")
+
+    print("\n[4/4] Exporting to ONNX...")
+    onnx_path = YOLO(ckpt).export(format='onnx', imgsz=args.imgsz)
+    print(f"✅ ONNX model: {onnx_path}")
+
+    target = 'public/models/yolov5.onnx'
+    if not args.install:
+        print(f"\n📋 Not installed. Re-run with --install, or copy it yourself: {onnx_path} → {target}")
+    elif not improved:
+        print(f"\n❌ Not copied to {target}: mAP50-95 dropped")
+        sys.exit(1)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(onnx_path, target)
+        print(f"✅ Copied to: {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,11 +17,23 @@ interface YOLODetectionResult {
   timestamp: number;
 }
 
+// Per-class thresholds written by calibrate.py (<model>.calibration.json)
+interface YOLOCalibration {
+  classes: string[];
+  thresholds: number[];
+  temperatures: number[];
+  minThreshold: number;
+  imgsz?: number; // Input size the thresholds were fitted at
+}
+
 interface UseYOLOv5DetectionOptions {
   enabled: boolean;
   videoElement?: HTMLVideoElement | null;
   modelPath?: string; // Path to your converted YOLOv5 model
+  preOptimized?: boolean; // Model was optimized offline by optimize_onnx.py (.opt.onnx / .ort)
+  inputSize?: number; // Square model input size (640 detector, 224 for train_classifier.py models)
   confidenceThreshold?: number; // Minimum confidence for detections
+  calibrationPath?: string; // Per-class thresholds from calibrate.py (overrides confidenceThreshold)
   onStatusChange?: (status: BehaviorStatus) => void;
   // Class mappings - adjust based on your YOLOv5 model classes
   classMappings?: {
@@ -31,6 +43,9 @@ interface UseYOLOv5DetectionOptions {
   };
 }
 
+// Output order of status classifiers exported by train_classifier.py ([1, 3] output)
+const CLASSIFIER_STATUSES: BehaviorStatus[] = ['distracted', 'normal', 'out-of-frame'];
+
 // Default class mappings - adjust these based on your trained model
 const DEFAULT_CLASS_MAPPINGS = {
   normal: ['person', 'sitting', 'attentive', 'focused'],
@@ -42,7 +57,10 @@ export const useYOLOv5Detection = ({
   enabled,
   videoElement,
   modelPath = '/models/yolov5.onnx', // Default path - update with your model path
+  preOptimized = false,
+  inputSize = 640,
   confidenceThreshold = 0.5,
+  calibrationPath,
   onStatusChange,
   classMappings = DEFAULT_CLASS_MAPPINGS,
 }: UseYOLOv5DetectionOptions) => {
@@ -56,6 +74,7 @@ export const useYOLOv5Detection = ({
   const [modelLoaded, setModelLoaded] = useState(false);
   const [modelLoading, setModelLoading] = useState(false);
   const modelRef = useRef<any>(null);
+  const calibrationRef = useRef<YOLOCalibration | null>(null);
   const canvasRef = useRef<HTMLCanvasElement | null>(null);
   const animationFrameRef = useRef<number | null>(null);
   const lastStatusRef = useRef<BehaviorStatus>('normal');
@@ -78,8 +97,26 @@ export const useYOLOv5Detection = ({
           // Load the model
           const session = await ort.InferenceSession.create(modelPath, {
             executionProviders: ['wasm'], // or 'webgl' for GPU acceleration
+            // Skip the per-load graph optimization pass when it was already done offline
+            graphOptimizationLevel: preOptimized ? 'disabled' : 'all',
           });
           
+          if (calibrationPath) {
+            try {
+              const response = await fetch(calibrationPath);
+              calibrationRef.current = await response.json();
+              const fittedAt = calibrationRef.current?.imgsz;
+              if (fittedAt && fittedAt !== inputSize) {
+                console.warn(
+                  `Calibration was fitted at ${fittedAt}px but inputSize is ${inputSize}px; ` +
+                  'thresholds may not match. Re-run calibrate.py with --imgsz or change inputSize.'
+                );
+              }
+            } catch (error) {
+              console.warn('Could not load calibration, using confidenceThreshold:', error);
+            }
+          }
+
           modelRef.current = session;
           setModelLoaded(true);
           console.log('YOLOv5 model loaded successfully');
@@ -94,7 +131,7 @@ export const useYOLOv5Detection = ({
     };
 
     loadModel();
-  }, [enabled, modelPath, modelLoaded, modelLoading]);
+  }, [enabled, modelPath, preOptimized, calibrationPath, inputSize, modelLoaded, modelLoading]);
 
   // Preprocess image for YOLOv5 input
   const preprocessImage = useCallback(
@@ -105,8 +142,6 @@ export const useYOLOv5Detection = ({
       const imageData = ctx.getImageData(0, 0, canvas.width, canvas.height);
       const data = imageData.data;
 
-      // YOLOv5 expects input size of 640x640
-      const inputSize = 640;
       const tensor = new Float32Array(3 * inputSize * inputSize);
 
       // Resize and normalize (0-1 range, RGB channels)
@@ -123,7 +158,7 @@ export const useYOLOv5Detection = ({
 
       return tensor;
     },
-    []
+    [inputSize]
   );
 
   // Postprocess YOLOv5 output
@@ -145,6 +180,11 @@ export const useYOLOv5Detection = ({
       const isFlat = outputDims.length === 1;
       const totalElements = numDetections * (5 + numClasses);
 
+      // Class scores are multiplied by objectness, so anything with
+      // objectness below the lowest class threshold can never pass
+      const calibration = calibrationRef.current;
+      const minThreshold = calibration ? calibration.minThreshold : confidenceThreshold;
+
       for (let i = 0; i < numDetections && i * (5 + numClasses) < totalElements; i++) {
         const offset = i * (5 + numClasses);
         if (offset + 4 >= outputData.length) break;
@@ -155,7 +195,7 @@ export const useYOLOv5Detection = ({
         const h = outputData[offset + 3];
         const objectness = outputData[offset + 4];
 
-        if (objectness < confidenceThreshold) continue;
+        if (objectness < minThreshold) continue;
 
         // Find class with highest confidence
         let maxConf = 0;
@@ -168,7 +208,18 @@ export const useYOLOv5Detection = ({
           }
         }
 
-        if (maxConf < confidenceThreshold) continue;
+        const threshold = calibration
+          ? calibration.thresholds[maxClass] ?? minThreshold
+          : confidenceThreshold;
+        if (maxConf < threshold) continue;
+
+        // Temperature-scaled confidence, if calibrate.py --temperature was used
+        let confidence = maxConf;
+        const temperature = calibration?.temperatures[maxClass] ?? 1;
+        if (temperature !== 1) {
+          const p = Math.min(Math.max(maxConf, 1e-6), 1 - 1e-6);
+          confidence = 1 / (1 + Math.exp(-Math.log(p / (1 - p)) / temperature));
+        }
 
         // Convert normalized coordinates to pixel coordinates
         // YOLOv5 outputs center x, center y, width, height (normalized 0-1)
@@ -180,8 +231,9 @@ export const useYOLOv5Detection = ({
         ];
 
         detections.push({
-          class: `class_${maxClass}`, // You'll need to map this to your class names
-          confidence: maxConf,
+          // Class names come from the calibration file when available
+          class: calibration?.classes[maxClass] ?? `class_${maxClass}`,
+          confidence,
           bbox,
         });
       }
@@ -286,7 +338,7 @@ export const useYOLOv5Detection = ({
       const tensor = new ort.Tensor(
         'float32',
         inputTensor,
-        [1, 3, 640, 640] // [batch, channels, height, width]
+        [1, 3, inputSize, inputSize] // [batch, channels, height, width]
       );
 
       const results = await modelRef.current.run({
@@ -294,24 +346,41 @@ export const useYOLOv5Detection = ({
       });
 
       const output = results[outputName];
-
-      // Postprocess output
-      const detections = postprocessOutput(output, canvas.width, canvas.height);
-
-      // Classify behavior
-      const status = classifyBehavior(detections);
-      const avgConfidence =
-        detections.length > 0
-          ? detections.reduce((sum, d) => sum + d.confidence, 0) /
-            detections.length
-          : 0;
-
-      const newResult: YOLODetectionResult = {
-        status,
-        confidence: avgConfidence,
-        detections,
-        timestamp: Date.now(),
-      };
+      const outputDims = output.dims || [];
+
+      let newResult: YOLODetectionResult;
+      if (outputDims.length === 2 && outputDims[1] === CLASSIFIER_STATUSES.length) {
+        // Status classifier: one score per status, no boxes to decode
+        const scores = output.data as Float32Array;
+        let best = 0;
+        for (let i = 1; i < CLASSIFIER_STATUSES.length; i++) {
+          if (scores[i] > scores[best]) best = i;
+        }
+        newResult = {
+          status: CLASSIFIER_STATUSES[best],
+          confidence: scores[best],
+          detections: [],
+          timestamp: Date.now(),
+        };
+      } else {
+        // Postprocess output
+        const detections = postprocessOutput(output, canvas.width, canvas.height);
+
+        // Classify behavior
+        const avgConfidence =
+          detections.length > 0
+            ? detections.reduce((sum, d) => sum + d.confidence, 0) /
+              detections.length
+            : 0;
+
+        newResult = {
+          status: classifyBehavior(detections),
+          confidence: avgConfidence,
+          detections,
+          timestamp: Date.now(),
+        };
+      }
+      const status = newResult.status;
 
       setResult(newResult);
 
@@ -333,6 +402,7 @@ export const useYOLOv5Detection = ({
     videoElement,
     enabled,
     modelLoaded,
+    inputSize,
     preprocessImage,
     postprocessOutput,
     classifyBehavior,
@@ -0,0 +1,388 @@
+"""
+Columnar analytics store for distraction records and status samples.
+
+DistractionRecords from useDistractionTimer (start, end, duration, reason,
+isPermanent) and per-interval status samples are appended to raw NumPy
+column files, partitioned by day and meeting:
+
+  analytics/
+    students.txt                      one id per line (code = line number)
+    meetings.txt
+    2026-10-19/<meetingId>/records/   student.i4 start.i8 end.i8 duration.i4 reason.u1 permanent.u1
+    2026-10-19/<meetingId>/samples/   student.i4 t.i8 status.u1
+    2026-10-18/_day/records/          compacted day: + meeting.i4, sorted by meeting
+    2026-10-18/_day/samples/
+
+Files are append-only and read back memory-mapped, so queries never parse
+JSON and only touch the days they ask for. Once a day is over, `compact`
+merges its meeting partitions into one segment (deduplicated, sorted by
+meeting), so a term-long query opens a few files per day instead of a few
+per meeting. Aggregations are vectorized with np.bincount.
+
+Usage:
+    python session_store.py ingest records.jsonl    # DistractionRecord / sample JSON lines
+    python session_store.py compact                 # compact every day before today
+    python session_store.py minutes 2026-09-01 2026-12-20
+    python session_store.py reasons 2026-09-01 2026-12-20
+    python session_store.py curve 2026-10-19 <meetingId>
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+STORE_DIR = 'analytics'
+STUDENTS_FILE = 'students.txt'
+MEETINGS_FILE = 'meetings.txt'
+DAY_SEGMENT = '_day'
+
+REASONS = ['motion', 'tab-switch', 'out-of-frame']
+STATUSES = ['normal', 'distracted', 'out-of-frame']
+
+RECORD_COLUMNS = {
+    'student': np.int32,
+    'start': np.int64,     # ms since epoch
+    'end': np.int64,       # ms since epoch, -1 while still running
+    'duration': np.int32,  # seconds
+    'reason': np.uint8,    # index into REASONS
+    'permanent': np.uint8,
+}
+SAMPLE_COLUMNS = {
+    'student': np.int32,
+    't': np.int64,         # ms since epoch
+    'status': np.uint8,    # index into STATUSES
+}
+
+
+def day_of(ms):
+    """UTC partition day for a millisecond timestamp."""
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _column_path(partition, column, dtype):
+    return os.path.join(partition, f'{column}.{np.dtype(dtype).str[1:]}')
+
+
+def _append_columns(partition, columns, spec):
+    os.makedirs(partition, exist_ok=True)
+    for name, dtype in spec.items():
+        with open(_column_path(partition, name, dtype), 'ab') as f:
+            f.write(np.asarray(columns[name], dtype=dtype).tobytes())
+
+
+def _read_columns(partition, spec):
+    """Memory-mapped columns of one partition (trimmed to the shortest column,
+    in case a write was interrupted between columns)."""
+    sizes = {}
+    for name, dtype in spec.items():
+        path = _column_path(partition, name, dtype)
+        sizes[name] = os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+    n = min(sizes.values())
+    if n == 0:
+        return {name: np.zeros(0, dtype=dtype) for name, dtype in spec.items()}
+    return {
+        name: np.memmap(_column_path(partition, name, dtype), dtype=dtype, mode='r', shape=(n,))
+        for name, dtype in spec.items()
+    }
+
+
+def _load_ids(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f]
+
+
+def _dedup(cols, keys, keep_max=None):
+    """One row per distinct `keys` (the one with the largest `keep_max`),
+    sorted by `keys`."""
+    if not len(cols[keys[0]]):
+        return cols
+    sort_keys = keys + [keep_max] if keep_max else keys
+    order = np.lexsort(tuple(cols[k] for k in reversed(sort_keys)))
+    last = np.zeros(len(order), dtype=bool)
+    last[-1] = True
+    for k in keys:
+        sorted_k = cols[k][order]
+        last[:-1] |= sorted_k[1:] != sorted_k[:-1]
+    keep = order[last]
+    return {name: col[keep] for name, col in cols.items()}
+
+
+def _concat(parts):
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+def _dedup_kind(kind, cols):
+    if kind == 'records':
+        # useDistractionTimer reports a long distraction twice (when it turns
+        # permanent, and again with endTime when it ends); keep the longest
+        return _dedup(cols, ['meeting', 'student', 'start'], keep_max='duration')
+    return _dedup(cols, ['meeting', 'student', 't'])
+
+
+class SessionStore:
+    """Append-only, day/meeting-partitioned columnar store."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.students = _load_ids(os.path.join(root, STUDENTS_FILE))
+        self.student_codes = {s: i for i, s in enumerate(self.students)}
+        self.meetings = _load_ids(os.path.join(root, MEETINGS_FILE))
+        self.meeting_codes = {m: i for i, m in enumerate(self.meetings)}
+
+    def _code(self, value, ids, codes, filename):
+        if value not in codes:
+            with open(os.path.join(self.root, filename), 'a', encoding='utf-8') as f:
+                f.write(value + '\n')
+            codes[value] = len(ids)
+            ids.append(value)
+        return codes[value]
+
+    def student_code(self, student_id):
+        return self._code(student_id, self.students, self.student_codes, STUDENTS_FILE)
+
+    def meeting_code(self, meeting_id):
+        return self._code(meeting_id, self.meetings, self.meeting_codes, MEETINGS_FILE)
+
+    # ============================================
+    # Ingestion
+    # ============================================
+
+    def append_records(self, records):
+        """Append DistractionRecord dicts (studentId, meetingId, startTime,
+        endTime?, duration, reason, isPermanent)."""
+        groups = {}
+        for r in records:
+            key = (day_of(r['startTime']), r['meetingId'])
+            groups.setdefault(key, []).append(r)
+        for (day, meeting), rows in groups.items():
+            self.meeting_code(meeting)
+            _append_columns(os.path.join(self.root, day, meeting, 'records'), {
+                'student': [self.student_code(r['studentId']) for r in rows],
+                'start': [r['startTime'] for r in rows],
+                'end': [r.get('endTime') or -1 for r in rows],
+                'duration': [r['duration'] for r in rows],
+                'reason': [REASONS.index(r['reason']) for r in rows],
+                'permanent': [bool(r['isPermanent']) for r in rows],
+            }, RECORD_COLUMNS)
+
+    def append_samples(self, samples):
+        """Append status samples: dicts with studentId, meetingId, t (ms), status."""
+        groups = {}
+        for s in samples:
+            groups.setdefault((day_of(s['t']), s['meetingId']), []).append(s)
+        for (day, meeting), rows in groups.items():
+            self.meeting_code(meeting)
+            _append_columns(os.path.join(self.root, day, meeting, 'samples'), {
+                'student': [self.student_code(s['studentId']) for s in rows],
+                't': [s['t'] for s in rows],
+                'status': [STATUSES.index(s['status']) for s in rows],
+            }, SAMPLE_COLUMNS)
+
+    def ingest_jsonl(self, path, batch=10000):
+        """Ingest a JSON-lines export: lines with startTime are records,
+        lines with t/status are samples."""
+        records, samples = [], []
+        count = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                (records if 'startTime' in row else samples).append(row)
+                count += 1
+                if len(records) >= batch:
+                    self.append_records(records)
+                    records = []
+                if len(samples) >= batch:
+                    self.append_samples(samples)
+                    samples = []
+        self.append_records(records)
+        self.append_samples(samples)
+        return count
+
+    # ============================================
+    # Compaction
+    # ============================================
+
+    def days(self, start_day=None, end_day=None):
+        """Partition days in the range (inclusive, YYYY-MM-DD)."""
+        return [
+            day for day in sorted(os.listdir(self.root))
+            if os.path.isdir(os.path.join(self.root, day))
+            and not (start_day and day < start_day) and not (end_day and day > end_day)
+        ]
+
+    def _live_meetings(self, day):
+        path = os.path.join(self.root, day)
+        return [m for m in sorted(os.listdir(path)) if not m.startswith('_')]
+
+    def compact(self, day):
+        """Merge a finished day's meeting partitions into one segment per kind.
+
+        Re-running is safe: the existing segment is merged in again and
+        duplicates dropped, so an interrupted compaction loses nothing.
+        """
+        meetings = self._live_meetings(day)
+        if not meetings:
+            return 0
+        rows = 0
+        for kind, spec in (('records', RECORD_COLUMNS), ('samples', SAMPLE_COLUMNS)):
+            parts = [cols for cols, _ in self._segments(kind, day, meetings) if len(cols['meeting'])]
+            if not parts:
+                continue
+            cols = _dedup_kind(kind, _concat(parts))
+            del parts  # release the old segment's memmaps (Windows can't delete mapped files)
+            target = os.path.join(self.root, day, DAY_SEGMENT, kind)
+            tmp = target + '.tmp'
+            shutil.rmtree(tmp, ignore_errors=True)
+            _append_columns(tmp, cols, {**spec, 'meeting': np.int32})
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp, target)
+            rows += len(cols['meeting'])
+        for m in meetings:
+            shutil.rmtree(os.path.join(self.root, day, m))
+        return rows
+
+    # ============================================
+    # Queries
+    # ============================================
+
+    def _segments(self, kind, day, meetings, meeting=None):
+        """(columns, compacted) for the day segment and the given live
+        meeting partitions; the day segment is sliced to `meeting`."""
+        spec = RECORD_COLUMNS if kind == 'records' else SAMPLE_COLUMNS
+        segment = os.path.join(self.root, day, DAY_SEGMENT, kind)
+        if os.path.isdir(segment):
+            cols = _read_columns(segment, {**spec, 'meeting': np.int32})
+            if meeting is not None:
+                code = self.meeting_codes.get(meeting, -1)
+                lo, hi = np.searchsorted(cols['meeting'], [code, code + 1])
+                cols = {name: col[lo:hi] for name, col in cols.items()}
+            yield cols, True
+        for m in meetings:
+            partition = os.path.join(self.root, day, m, kind)
+            if os.path.isdir(partition):
+                cols = _read_columns(partition, spec)
+                cols['meeting'] = np.full(len(cols['student']), self.meeting_codes[m], dtype=np.int32)
+                yield cols, False
+
+    def _columns(self, kind, start_day=None, end_day=None, meeting=None):
+        """Columns of `kind` per day in the range. A fully compacted day is
+        returned as it is; a day with live partitions is merged with its
+        segment (if any) and deduplicated, since a late report can repeat a
+        distraction that was already compacted."""
+        for day in self.days(start_day, end_day):
+            meetings = self._live_meetings(day) if meeting is None else [meeting]
+            parts, live = [], False
+            for cols, compacted in self._segments(kind, day, meetings, meeting):
+                if len(cols['student']):
+                    parts.append(cols)
+                    live |= not compacted
+            if live:
+                yield _dedup_kind(kind, _concat(parts))
+            elif parts:
+                yield parts[0]
+
+    def distraction_minutes(self, start_day=None, end_day=None, meeting=None, permanent_only=False):
+        """Total distraction minutes per student: {student_id: minutes}."""
+        totals = np.zeros(len(self.students), dtype=np.float64)
+        for cols in self._columns('records', start_day, end_day, meeting):
+            weights = cols['duration'].astype(np.float64)
+            if permanent_only:
+                weights *= cols['permanent']
+            totals += np.bincount(cols['student'], weights=weights, minlength=len(self.students))
+        return {self.students[i]: totals[i] / 60 for i in np.nonzero(totals)[0]}
+
+    def reason_breakdown(self, start_day=None, end_day=None, meeting=None):
+        """{reason: {'count': n, 'minutes': m}} over the range."""
+        counts = np.zeros(len(REASONS), dtype=np.int64)
+        seconds = np.zeros(len(REASONS), dtype=np.float64)
+        for cols in self._columns('records', start_day, end_day, meeting):
+            counts += np.bincount(cols['reason'], minlength=len(REASONS))
+            seconds += np.bincount(cols['reason'], weights=cols['duration'], minlength=len(REASONS))
+        return {
+            reason: {'count': int(counts[i]), 'minutes': seconds[i] / 60}
+            for i, reason in enumerate(REASONS)
+        }
+
+    def attention_curve(self, start_day=None, end_day=None, meeting=None, bucket_seconds=60):
+        """Share of 'normal' samples per time bucket across the class.
+
+        Returns (bucket_start_ms, attentive_share, samples_per_bucket);
+        buckets are relative to the first sample in the range.
+        """
+        parts = list(self._columns('samples', start_day, end_day, meeting))
+        if not parts:
+            return np.zeros(0, np.int64), np.zeros(0), np.zeros(0, np.int64)
+
+        origin = min(int(p['t'].min()) for p in parts)
+        bucket_ms = bucket_seconds * 1000
+        n = max(int(p['t'].max()) for p in parts) - origin
+        n = n // bucket_ms + 1
+        total = np.zeros(n, dtype=np.int64)
+        attentive = np.zeros(n, dtype=np.int64)
+        for p in parts:
+            buckets = (p['t'] - origin) // bucket_ms
+            total += np.bincount(buckets, minlength=n)
+            attentive += np.bincount(buckets[p['status'] == 0], minlength=n)
+        share = np.divide(attentive, total, out=np.zeros(n), where=total > 0)
+        return origin + np.arange(n) * bucket_ms, share, total
+
+
+def main():
+    commands = ('ingest', 'compact', 'minutes', 'reasons', 'curve')
+    if len(sys.argv) < 2 or sys.argv[1] not in commands or (sys.argv[1] != 'compact' and len(sys.argv) < 3):
+        print("Usage:")
+        print("  python session_store.py ingest <file.jsonl>")
+        print("  python session_store.py compact [day ...]")
+        print("  python session_store.py minutes <start_day> [end_day]")
+        print("  python session_store.py reasons <start_day> [end_day]")
+        print("  python session_store.py curve <day> [meetingId]")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("Session Analytics")
+    print("=" * 60)
+
+    command = sys.argv[1]
+    store = SessionStore()
+    start = time.perf_counter()
+
+    if command == 'ingest':
+        count = store.ingest_jsonl(sys.argv[2])
+        print(f"✅ Ingested {count} rows into {STORE_DIR}/")
+    elif command == 'compact':
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        days = sys.argv[2:] or [d for d in store.days() if d < today]
+        rows = sum(store.compact(day) for day in days)
+        print(f"✅ Compacted {len(days)} days ({rows} rows)")
+    elif command == 'minutes':
+        end_day = sys.argv[3] if len(sys.argv) > 3 else sys.argv[2]
+        minutes = store.distraction_minutes(sys.argv[2], end_day)
+        for student, m in sorted(minutes.items(), key=lambda item: -item[1]):
+            print(f"   {student:<30} {m:8.1f} min")
+    elif command == 'reasons':
+        end_day = sys.argv[3] if len(sys.argv) > 3 else sys.argv[2]
+        for reason, row in store.reason_breakdown(sys.argv[2], end_day).items():
+            print(f"   {reason:<14} {row['count']:8d} times  {row['minutes']:8.1f} min")
+    else:
+        meeting = sys.argv[3] if len(sys.argv) > 3 else None
+        times, share, samples = store.attention_curve(sys.argv[2], sys.argv[2], meeting)
+        for t, s, n in zip(times, share, samples):
+            if n:
+                stamp = datetime.fromtimestamp(t / 1000, tz=timezone.utc).strftime('%H:%M')
+                print(f"   {stamp}  {'█' * int(s * 40):<40} {s:5.0%}")
+
+    print(f"\n⏱️  {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Reference aggregator for class-wide student status traffic.
+
+Today every student writes its status to localStorage and the teacher's
+useStudentStatusListener polls every participant every 2 seconds. This is a
+small local service showing the push alternative:
+  - students send a message only when their status changes (or the
+    distraction timer ticks), like useStudentStatusBroadcast
+  - per-student state lives in compact typed arrays, not dicts of objects
+  - teachers get one coalesced delta per flush interval with only the
+    students that changed, instead of polling everyone
+
+Protocol: newline-delimited JSON over TCP.
+  student -> {"type": "hello", "role": "student", "id": "...", "name": "..."}
+             {"type": "status", "status": "distracted", "isDistracted": true,
+              "duration": 12, "permanent": false, "sent": <unix time>}
+  teacher -> {"type": "hello", "role": "teacher"}
+          <- {"type": "snapshot", "students": [[id, name, status, isDistracted, duration, permanent, sent], ...]}
+          <- {"type": "delta", "students": [...same rows, changed students only...]}
+  any     -> {"type": "stats"}  <- {"type": "stats", ...}
+
+Usage:
+    python status_aggregator.py [port]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from array import array
+
+PORT = 8765
+FLUSH_INTERVAL = 0.25  # seconds between coalesced deltas
+STATUSES = ['normal', 'distracted', 'out-of-frame']
+STATUS_CODES = {s: i for i, s in enumerate(STATUSES)}
+
+
+class StatusAggregator:
+    """Per-student state in parallel arrays, indexed by join order."""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.ids = []
+        self.names = []
+        self.index = {}
+        self.status = array('B')
+        self.distracted = array('B')
+        self.permanent = array('B')
+        self.duration = array('I')
+        self.sent = array('d')
+        self.dirty = bytearray()
+        self.dirty_list = []
+        self.teachers = set()
+        self.handlers = set()
+        self.messages_in = 0
+        self.deltas_out = 0
+        self.bytes_out = 0
+        self.started = time.time()
+
+    def join(self, student_id, name):
+        if student_id in self.index:
+            return self.index[student_id]
+        i = len(self.ids)
+        self.index[student_id] = i
+        self.ids.append(student_id)
+        self.names.append(name)
+        self.status.append(0)
+        self.distracted.append(0)
+        self.permanent.append(0)
+        self.duration.append(0)
+        self.sent.append(0.0)
+        self.dirty.append(0)
+        return i
+
+    def update(self, i, message):
+        self.messages_in += 1
+        self.status[i] = STATUS_CODES.get(message.get('status'), 0)
+        self.distracted[i] = bool(message.get('isDistracted'))
+        self.permanent[i] = bool(message.get('permanent'))
+        self.duration[i] = int(message.get('duration', 0))
+        self.sent[i] = float(message.get('sent', 0.0))
+        if not self.dirty[i]:
+            self.dirty[i] = 1
+            self.dirty_list.append(i)
+
+    def row(self, i):
+        return [
+            self.ids[i], self.names[i], STATUSES[self.status[i]],
+            bool(self.distracted[i]), self.duration[i], bool(self.permanent[i]), self.sent[i],
+        ]
+
+    def snapshot(self):
+        return {'type': 'snapshot', 'students': [self.row(i) for i in range(len(self.ids))]}
+
+    def take_delta(self):
+        """Rows of students changed since the last call, each once."""
+        if not self.dirty_list:
+            return None
+        rows = [self.row(i) for i in self.dirty_list]
+        for i in self.dirty_list:
+            self.dirty[i] = 0
+        self.dirty_list = []
+        return {'type': 'delta', 'students': rows}
+
+    def state_bytes(self):
+        """Bytes held by per-student state (arrays, ids and names)."""
+        arrays = (self.status, self.distracted, self.permanent, self.duration, self.sent)
+        total = sum(a.itemsize * len(a) for a in arrays) + len(self.dirty)
+        total += sum(sys.getsizeof(s) for s in self.ids) + sum(sys.getsizeof(s) for s in self.names)
+        total += sys.getsizeof(self.index)
+        return total
+
+    def stats(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        students = len(self.ids)
+        return {
+            'type': 'stats',
+            'students': students,
+            'teachers': len(self.teachers),
+            'messagesIn': self.messages_in,
+            'deltasOut': self.deltas_out,
+            'bytesOut': self.bytes_out,
+            'messagesInPerSec': self.messages_in / elapsed,
+            'deltasOutPerSec': self.deltas_out / elapsed,
+            'stateBytesPerStudent': self.state_bytes() / students if students else 0,
+        }
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            delta = self.take_delta()
+            if delta is None or not self.teachers:
+                continue
+            payload = (json.dumps(delta, separators=(',', ':')) + '\n').encode()
+            for writer in list(self.teachers):
+                try:
+                    writer.write(payload)
+                    self.deltas_out += 1
+                    self.bytes_out += len(payload)
+                except ConnectionError:
+                    self.teachers.discard(writer)
+
+    async def handle(self, reader, writer):
+        student = None
+        self.handlers.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                kind = message.get('type')
+                if kind == 'status' and student is not None:
+                    self.update(student, message)
+                elif kind == 'hello' and message.get('role') == 'student':
+                    student = self.join(message['id'], message.get('name', message['id']))
+                elif kind == 'hello' and message.get('role') == 'teacher':
+                    self.teachers.add(writer)
+                    writer.write((json.dumps(self.snapshot()) + '\n').encode())
+                    await writer.drain()
+                elif kind == 'stats':
+                    writer.write((json.dumps(self.stats()) + '\n').encode())
+                    await writer.drain()
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            self.teachers.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=PORT):
+        """Start listening; returns the asyncio server (flush loop runs alongside)."""
+        self.server = await asyncio.start_server(self.handle, host, port, limit=2 ** 20)
+        self._flush_task = asyncio.ensure_future(self.flush_loop())
+        return self.server
+
+    async def close(self):
+        """Stop listening and wait for open connections to finish."""
+        self._flush_task.cancel()
+        self.server.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+
+async def _serve_forever(port):
+    aggregator = StatusAggregator()
+    server = await aggregator.serve(port=port)
+    print(f"✅ Listening on 127.0.0.1:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+
+    print("=" * 60)
+    print("Student Status Aggregator")
+    print("=" * 60)
+    try:
+        asyncio.run(_serve_forever(port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Load generator for class-wide student status traffic.
+
+Simulates N students sending status updates the way
+useStudentStatusBroadcast + useDistractionTimer do (a message on every status
+change, and one per second while distracted), driven by recorded detection
+traces. A simulated teacher receives the aggregator's coalesced deltas.
+Reports, per class size:
+  - end-to-end latency (student send -> teacher receive)
+  - messages per second in and deltas per second out
+  - aggregator memory per student
+  - the reads/s the current 2 s localStorage polling would need
+
+Traces are JSONL, one per line: {"id": "...", "samples": [[t_seconds, "status"], ...]}
+(e.g. recorded from useYOLOv5Detection). Without --traces a synthetic set
+is generated; --make-traces writes one to disk.
+
+Usage:
+    python status_loadgen.py --students 50 100 200 400 --duration 20
+    python status_loadgen.py --make-traces traces.jsonl
+    python status_loadgen.py --traces traces.jsonl --connect 127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import status_aggregator
+from status_aggregator import StatusAggregator
+
+PERMANENT_AFTER = 30  # seconds, useDistractionTimer's distractionThreshold
+POLL_INTERVAL = 2.0   # useStudentStatusListener
+
+# Per-second transition probabilities for synthetic traces
+TRANSITIONS = {
+    'normal': {'distracted': 0.02, 'out-of-frame': 0.005},
+    'distracted': {'normal': 0.15},
+    'out-of-frame': {'normal': 0.1},
+}
+
+
+def make_traces(count=50, seconds=600, seed=0):
+    """Synthetic per-second status traces (mostly attentive, short distractions)."""
+    rng = random.Random(seed)
+    traces = []
+    for n in range(count):
+        status = 'normal'
+        samples = []
+        for t in range(seconds):
+            r = rng.random()
+            for target, p in TRANSITIONS[status].items():
+                if r < p:
+                    status = target
+                    break
+                r -= p
+            samples.append([t, status])
+        traces.append({'id': f'trace-{n}', 'samples': samples})
+    return traces
+
+
+def load_traces(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _status_at(samples, t):
+    """Status of a trace at time t (wraps around)."""
+    span = samples[-1][0] + 1
+    t = t % span
+    lo, hi = 0, len(samples) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if samples[mid][0] <= t:
+            lo = mid
+        else:
+            hi = mid - 1
+    return samples[lo][1]
+
+
+async def student(host, port, student_id, trace, duration, counter):
+    """One student: replays a trace from a random offset."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps({'type': 'hello', 'role': 'student', 'id': student_id}) + '\n').encode())
+
+    samples = trace['samples']
+    offset = random.uniform(0, samples[-1][0] + 1)
+    start = time.time()
+    last = None
+    distracted_since = None
+    await asyncio.sleep(random.uniform(0, 1))  # don't start in lockstep
+
+    while time.time() - start < duration:
+        now = time.time()
+        status = _status_at(samples, now - start + offset)
+        is_distracted = status != 'normal'
+        if is_distracted and distracted_since is None:
+            distracted_since = now
+        elif not is_distracted:
+            distracted_since = None
+        seconds = int(now - distracted_since) if distracted_since else 0
+        state = (status, is_distracted, seconds)
+
+        if state != last:
+            writer.write((json.dumps({
+                'type': 'status',
+                'status': status,
+                'isDistracted': is_distracted,
+                'duration': seconds,
+                'permanent': seconds >= PERMANENT_AFTER,
+                'sent': now,
+            }) + '\n').encode())
+            counter[0] += 1
+            last = state
+        await asyncio.sleep(1.0)
+
+    await writer.drain()
+    writer.close()
+
+
+async def teacher(host, port, latencies, stop):
+    """Receives the snapshot and deltas; records latency of every row."""
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 22)
+    writer.write(b'{"type": "hello", "role": "teacher"}\n')
+    await writer.drain()
+    while not stop.is_set():
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=0.5)
+        except asyncio.TimeoutError:
+            continue
+        if not line:
+            break
+        message = json.loads(line)
+        if message['type'] == 'delta':
+            now = time.time()
+            latencies.extend(now - row[6] for row in message['students'] if row[6])
+    writer.close()
+
+
+async def query_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"type": "stats"}\n')
+    await writer.drain()
+    stats = json.loads(await reader.readline())
+    writer.close()
+    return stats
+
+
+def _aggregator_bytes(snapshot):
+    """Bytes in a tracemalloc snapshot allocated from status_aggregator code
+    (anywhere on the stack), leaving out the simulated clients."""
+    aggregator_only = [tracemalloc.Filter(True, status_aggregator.__file__, all_frames=True)]
+    return sum(stat.size for stat in snapshot.filter_traces(aggregator_only).statistics('filename'))
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run_class(students, traces, duration, connect=None):
+    """One class of `students`; returns a result row."""
+    aggregator = None
+    if connect:
+        host, port = connect.split(':')
+        port = int(port)
+    else:
+        tracemalloc.start(25)
+        aggregator = StatusAggregator()
+        server = await aggregator.serve(port=0)
+        host, port = '127.0.0.1', server.sockets[0].getsockname()[1]
+
+    latencies, counter, stop = [], [0], asyncio.Event()
+    teacher_task = asyncio.ensure_future(teacher(host, port, latencies, stop))
+    await asyncio.sleep(0.1)
+    # Counters are cumulative over the aggregator's lifetime; diff this run only
+    before = await query_stats(host, port)
+    if aggregator:
+        memory_before = _aggregator_bytes(tracemalloc.take_snapshot())
+    await asyncio.gather(*(
+        student(host, port, f'student-{n}', traces[n % len(traces)], duration, counter)
+        for n in range(students)
+    ))
+    await asyncio.sleep(0.5)  # last flush
+    stats = await query_stats(host, port)
+    if aggregator:
+        memory_after = _aggregator_bytes(tracemalloc.take_snapshot())
+    stop.set()
+    await teacher_task
+
+    row = {
+        'students': students,
+        'msgsInPerSec': counter[0] / duration,
+        'deltasPerSec': (stats['deltasOut'] - before['deltasOut']) / duration,
+        'latencyP50Ms': _percentile(latencies, 0.5) * 1000,
+        'latencyP95Ms': _percentile(latencies, 0.95) * 1000,
+        'stateBytesPerStudent': stats['stateBytesPerStudent'],
+        'pollReadsPerSec': students / POLL_INTERVAL,
+    }
+    if aggregator:
+        row['tracedBytesPerStudent'] = (memory_after - memory_before) / students
+        tracemalloc.stop()
+        await aggregator.close()
+    return row
+
+
+async def run(class_sizes, traces, duration, connect=None):
+    rows = []
+    for students in class_sizes:
+        print(f"\n⏱️  {students} students for {duration:g}s...")
+        rows.append(await run_class(students, traces, duration, connect))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Student status load generator")
+    parser.add_argument('--students', type=int, nargs='+', default=[50, 100, 200])
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds per class size")
+    parser.add_argument('--traces', help="JSONL detection traces")
+    parser.add_argument('--make-traces', metavar='PATH', help="write synthetic traces and exit")
+    parser.add_argument('--connect', metavar='HOST:PORT', help="use a running status_aggregator.py")
+    args = parser.parse_args()
+
+    if args.make_traces:
+        with open(args.make_traces, 'w', encoding='utf-8') as f:
+            for trace in make_traces():
+                f.write(json.dumps(trace) + '\n')
+        print(f"✅ Traces written: {args.make_traces}")
+        return
+
+    print("=" * 60)
+    print("Student Status Load Test")
+    print("=" * 60)
+
+    traces = load_traces(args.traces) if args.traces else make_traces()
+    print(f"✅ {len(traces)} traces" + (f" from {args.traces}" if args.traces else " (synthetic)"))
+
+    try:
+        rows = asyncio.run(run(args.students, traces, args.duration, args.connect))
+    except OSError as e:
+        print(f"❌ {e} (raise the open-file limit for large classes)")
+        sys.exit(1)
+
+    # state B = compact per-student arrays; total B = everything allocated
+    # from status_aggregator code per student, e.g. read buffers and parsed
+    # messages (in-process only; the simulated clients are excluded)
+    print(f"\n{'students':>9} {'msgs in/s':>10} {'deltas/s':>9} {'p50 ms':>8} {'p95 ms':>8}"
+          f" {'state B':>8} {'total B':>8} {'poll reads/s':>13}")
+    for r in rows:
+        total = r.get('tracedBytesPerStudent')
+        print(f"{r['students']:>9} {r['msgsInPerSec']:>10.1f} {r['deltasPerSec']:>9.1f}"
+              f" {r['latencyP50Ms']:>8.1f} {r['latencyP95Ms']:>8.1f}"
+              f" {r['stateBytesPerStudent']:>8.0f} {f'{total:.0f}' if total else '-':>8}"
+              f" {r['pollReadsPerSec']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Time-budgeted training - "train for 40 minutes on this box".
+
+Instead of a fixed epochs=70 and a 15-45 min / 1-3 hour guess, give a
+wall-clock budget. This script:
+  - measures throughput over the first batches and sizes the epoch count
+    (and the LR schedule, which depends on it) to fit the budget
+  - keeps refining that estimate every epoch and stops at the deadline
+  - checkpoints every few minutes instead of only at epoch ends
+  - keeps a reserve at the end so the best model is always exported to
+    ONNX before the deadline
+
+Usage:
+    python time_budget.py 40 [data.yaml]
+"""
+
+import math
+import os
+import shutil
+import sys
+import time
+
+BASE_MODEL = 'yolov5n.pt'
+IMGSZ = 416
+MEASURE_BATCHES = 20       # batches timed before sizing the run
+CHECKPOINT_MINUTES = 10    # save last.pt at least this often
+MIN_RESERVE_MINUTES = 3    # final validation + ONNX export
+RESERVE_FRACTION = 0.1
+
+
+class TimeBudget:
+    """ultralytics callbacks that fit a training run into a time budget."""
+
+    def __init__(self, train_seconds, checkpoint_minutes=CHECKPOINT_MINUTES,
+                 measure_batches=MEASURE_BATCHES):
+        self.train_seconds = train_seconds
+        self.checkpoint_seconds = checkpoint_minutes * 60
+        self.measure_batches = measure_batches
+        self.sized = False
+        self.batches = 0
+        self.last_checkpoint = None
+
+    def on_train_epoch_start(self, trainer):
+        if self.last_checkpoint is None:
+            self.last_checkpoint = time.time()
+
+    def on_train_batch_end(self, trainer):
+        self.batches += 1
+        if not self.sized and self.batches >= min(self.measure_batches, len(trainer.train_loader)):
+            self._size_run(trainer)
+        # save_model() reads results.csv in some 8.x releases and raises before
+        # the first epoch has written it; that epoch's own save covers the gap.
+        if time.time() - self.last_checkpoint >= self.checkpoint_seconds and trainer.csv.exists():
+            self._checkpoint(trainer)
+
+    def _size_run(self, trainer):
+        """Pick epochs from measured throughput and refit the LR schedule.
+
+        ultralytics only does this after the first full epoch, which on CPU
+        can already be a sizable part of the budget.
+        """
+        self.sized = True
+        elapsed = time.time() - trainer.train_time_start
+        epoch_seconds = elapsed / self.batches * len(trainer.train_loader)
+        epochs = max(1, math.floor(self.train_seconds / epoch_seconds))
+        trainer.args.epochs = trainer.epochs = epochs
+        trainer._setup_scheduler()
+        trainer.scheduler.last_epoch = trainer.epoch
+        print(f"\n⏱️  ~{epoch_seconds / 60:.1f} min/epoch → {epochs} epochs fit the budget")
+
+    def _checkpoint(self, trainer):
+        """Write last.pt mid-epoch. best.pt is left to the epoch-end logic."""
+        fitness = trainer.fitness
+        trainer.fitness = float('nan')  # never equal to best_fitness, so best.pt is untouched
+        try:
+            trainer.save_model()
+        finally:
+            trainer.fitness = fitness
+        self.last_checkpoint = time.time()
+
+    def attach(self, model):
+        model.add_callback('on_train_epoch_start', self.on_train_epoch_start)
+        model.add_callback('on_train_batch_end', self.on_train_batch_end)
+
+
+def reserve_minutes(minutes):
+    return max(MIN_RESERVE_MINUTES, RESERVE_FRACTION * minutes)
+
+
+def train_within(minutes, data='data.yaml', weights=BASE_MODEL, imgsz=IMGSZ,
+                 checkpoint_minutes=CHECKPOINT_MINUTES, **train_args):
+    """Train and export within `minutes` of wall-clock time.
+
+    Returns (best_pt, onnx_path, seconds_used).
+    """
+    from ultralytics import YOLO
+
+    start = time.time()
+    train_seconds = (minutes - reserve_minutes(minutes)) * 60
+    if train_seconds <= 0:
+        raise ValueError(f"A {minutes} min budget leaves no time to train")
+
+    model = YOLO(weights)
+    TimeBudget(train_seconds, checkpoint_minutes).attach(model)
+    train_args.setdefault('name', 'distraction_detector')
+    train_args.setdefault('epochs', 1000)  # upper bound; the budget decides
+    model.train(
+        data=data,
+        imgsz=imgsz,
+        time=train_seconds / 3600,  # ultralytics' own deadline and per-epoch refit
+        **train_args,
+    )
+
+    best = model.trainer.best if os.path.exists(model.trainer.best) else model.trainer.last
+    onnx_path = YOLO(best).export(format='onnx', imgsz=imgsz)
+    return str(best), str(onnx_path), time.time() - start
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python time_budget.py <minutes> [data.yaml]")
+        sys.exit(1)
+    minutes = float(sys.argv[1])
+    data = sys.argv[2] if len(sys.argv) > 2 else 'data.yaml'
+
+    print("=" * 60)
+    print(f"⏱️  Time-Budgeted YOLOv5 Training ({minutes:g} min)")
+    print("=" * 60)
+
+    if not os.path.exists(data):
+        print(f"❌ {data} not found!")
+        sys.exit(1)
+
+    print(f"\n   Training: {minutes - reserve_minutes(minutes):.1f} min")
+    print(f"   Reserved for validation + export: {reserve_minutes(minutes):.1f} min")
+    print(f"   Checkpoint every {CHECKPOINT_MINUTES} min")
+
+    try:
+        best, onnx_path, seconds = train_within(minutes, data)
+    except Exception as e:
+        print(f"❌ Training failed: {e}")
+        sys.exit(1)
+
+    print(f"\n✅ Done in {seconds / 60:.1f} of {minutes:g} min")
+    if seconds > minutes * 60:
+        print("⚠️  Over budget - increase RESERVE_FRACTION for this machine")
+    print(f"   Best model: {best}")
+    print(f"   ONNX:       {onnx_path}")
+
+    target = 'public/models/yolov5.onnx'
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copy2(onnx_path, target)
+    print(f"✅ Copied to: {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Behavior classifier - train a small image classifier instead of a detector.
+
+The app only needs a 3-way status (normal / distracted / out-of-frame), but
+the detector outputs 25200 candidate boxes per frame that the browser mostly
+throws away. This script:
+1. Builds a status dataset from your existing detection labels
+   (same rules as classifyBehavior in hooks/useYOLOv5Detection.ts)
+2. Trains a lightweight classifier: your detector's own backbone (same
+   architecture and weights) with a classification head, or yolov8n-cls
+   from ImageNet weights when no detector is given
+3. Exports it to ONNX / TF.js with a single [1, 3] output
+4. Benchmarks it against the detector: status accuracy and per-frame latency
+
+Usage:
+    python train_classifier.py [data.yaml] [detector.pt]
+
+Then load the classifier with useYOLOv5Detection:
+    modelPath: '/models/classifier.onnx', inputSize: 224
+"""
+
+import os
+import shutil
+import sys
+import time
+
+import yaml
+
+from dataset_shards import open_source
+
+# Output order of the exported classifier. ultralytics sorts class folders
+# alphabetically; CLASSIFIER_STATUSES in useYOLOv5Detection.ts must match.
+STATUSES = ['distracted', 'normal', 'out-of-frame']
+
+CLASSIFIER_MODEL = 'yolov8n-cls.pt'
+IMGSZ = 224
+EPOCHS = 30
+LATENCY_RUNS = 50
+
+
+def class_mappings(names):
+    """Split detector class names into normal / distracted / out-of-frame."""
+    normal = [c for c in names if any(x in c.lower() for x in ['normal', 'attentive', 'focused', 'person'])]
+    distracted = [c for c in names if any(x in c.lower() for x in ['distract', 'phone', 'away'])]
+    out_of_frame = [c for c in names if any(x in c.lower() for x in ['frame', 'empty', 'object'])]
+    return {'normal': normal, 'distracted': distracted, 'outOfFrame': out_of_frame}
+
+
+def status_for_classes(detected, mappings):
+    """Same decision order as classifyBehavior in useYOLOv5Detection.ts."""
+    if not detected:
+        return 'out-of-frame'
+    if any(c in mappings['outOfFrame'] for c in detected):
+        return 'out-of-frame'
+    if any(c in mappings['distracted'] for c in detected):
+        return 'distracted'
+    if any(c in mappings['normal'] for c in detected):
+        return 'normal'
+    return 'normal' if any('person' in c.lower() for c in detected) else 'distracted'
+
+
+def build_status_dataset(data_yaml, output_dir):
+    """Write an ImageFolder dataset (<split>/<status>/<image>) from detection labels.
+
+    Returns the per-split status histogram. Raises ValueError if the train
+    split lacks a status: ultralytics would train a classifier with fewer
+    outputs, which no longer matches CLASSIFIER_STATUSES in the hook.
+    """
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    names = data.get('names', [])
+    if isinstance(names, dict):
+        names = [names[k] for k in sorted(names)]
+    mappings = class_mappings(names)
+
+    histogram = {}
+    for key, split in (('train', 'train'), ('val', 'val'), ('test', 'test')):
+        if not data.get(key) or not os.path.exists(data[key]):
+            continue
+        reader = open_source(data[key])
+        counts = dict.fromkeys(STATUSES, 0)
+        for i in range(len(reader)):
+            image_bytes, label_text = reader.read(i)
+            detected = [
+                names[int(line.split()[0])]
+                for line in label_text.splitlines() if line.strip()
+            ]
+            status = status_for_classes(detected, mappings)
+            counts[status] += 1
+            target_dir = os.path.join(output_dir, split, status)
+            os.makedirs(target_dir, exist_ok=True)
+            with open(os.path.join(target_dir, reader.key(i) + reader.ext(i)), 'wb') as f:
+                f.write(image_bytes)
+        histogram[split] = counts
+
+    missing = [s for s in STATUSES if not histogram.get('train', {}).get(s)]
+    if missing:
+        raise ValueError(
+            f"No training images for status {missing} (train: {histogram.get('train')}); "
+            f"the classifier needs all of {STATUSES}"
+        )
+    return histogram, mappings
+
+
+def classifier_config(detector, output_dir):
+    """Model yaml with the detector's backbone and a classification head.
+
+    Layer indices and shapes match the detector, so model.load(detector)
+    transfers the whole backbone. ultralytics takes the model scale from the
+    yaml file name (guess_model_scale), not from its contents, so the name
+    carries the detector's scale; otherwise a yolov5s backbone would be
+    built at the n scale and almost nothing would load.
+    """
+    from ultralytics import YOLO
+
+    cfg = {
+        k: v for k, v in YOLO(detector).model.yaml.items()
+        if k not in ('head', 'nc', 'names', 'yaml_file')
+    }
+    cfg['nc'] = len(STATUSES)
+    cfg['head'] = [[-1, 1, 'Classify', [len(STATUSES)]]]
+    name = f"yolov5{cfg['scale']}-status-cls.yaml" if cfg.get('scale') else 'status-cls.yaml'
+    output_path = os.path.join(output_dir, name)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        yaml.dump(cfg, f, default_flow_style=None, sort_keys=False)
+    return output_path
+
+
+def check_backbone_transfer(model, detector):
+    """Raise ValueError unless every backbone tensor of detector was loaded into model."""
+    from ultralytics import YOLO
+    from ultralytics.utils.torch_utils import intersect_dicts
+
+    detector_sd = YOLO(detector).model.float().state_dict()
+    prefixes = tuple(f'model.{i}.' for i in range(len(model.model.yaml['backbone'])))
+    backbone = [k for k in detector_sd if k.startswith(prefixes)]
+    transferred = intersect_dicts(detector_sd, model.model.state_dict())
+    missing = [k for k in backbone if k not in transferred]
+    if missing:
+        raise ValueError(
+            f"Only {len(backbone) - len(missing)}/{len(backbone)} backbone tensors of {detector} "
+            f"fit the classifier (scale {model.model.yaml.get('scale')!r}), e.g. {missing[0]}"
+        )
+    return len(backbone)
+
+
+def train_classifier(dataset_dir, backbone=None, epochs=EPOCHS, imgsz=IMGSZ):
+    """Train the status classifier and return the path of the best weights.
+
+    With a detector .pt as backbone the classifier uses the same backbone
+    and starts from its weights; otherwise it is yolov8n-cls (ImageNet).
+    """
+    from ultralytics import YOLO
+
+    if backbone:
+        config = classifier_config(backbone, dataset_dir)
+        model = YOLO(config, task='classify')
+        model.load(backbone)
+        check_backbone_transfer(model, backbone)
+    else:
+        model = YOLO(CLASSIFIER_MODEL)
+    model.train(
+        data=dataset_dir,
+        epochs=epochs,
+        imgsz=imgsz,
+        batch=64,
+        name='status_classifier',
+        patience=10,
+    )
+    return model.trainer.best
+
+
+def export_classifier(weights, imgsz=IMGSZ):
+    """Export to ONNX and TF.js; both have a single [1, 3] softmax output."""
+    from ultralytics import YOLO
+
+    model = YOLO(weights)
+    onnx_path = model.export(format='onnx', imgsz=imgsz)
+    tfjs_path = model.export(format='tfjs', imgsz=imgsz)
+    return onnx_path, tfjs_path
+
+
+def detector_accuracy(detector, dataset_dir, mappings, imgsz=416):
+    """Status accuracy of the detector on the classifier's val split."""
+    from ultralytics import YOLO
+
+    model = YOLO(detector)
+    correct = total = 0
+    for status in STATUSES:
+        folder = os.path.join(dataset_dir, 'val', status)
+        if not os.path.isdir(folder):
+            continue
+        for result in model.predict(folder, imgsz=imgsz, conf=0.5, stream=True, verbose=False):
+            detected = [result.names[int(c)] for c in result.boxes.cls.tolist()]
+            correct += status_for_classes(detected, mappings) == status
+            total += 1
+    return correct / total if total else 0.0
+
+
+def classifier_accuracy(weights, dataset_dir, imgsz=IMGSZ):
+    """Top-1 accuracy of the classifier on the val split."""
+    from ultralytics import YOLO
+
+    metrics = YOLO(weights).val(data=dataset_dir, imgsz=imgsz, verbose=False)
+    return metrics.top1
+
+
+def onnx_latency(onnx_path, runs=LATENCY_RUNS):
+    """Median single-frame ONNX Runtime latency in milliseconds (CPU)."""
+    import numpy as np
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    model_input = session.get_inputs()[0]
+    shape = [d if isinstance(d, int) else 1 for d in model_input.shape]
+    frame = np.random.rand(*shape).astype(np.float32)
+
+    for _ in range(3):
+        session.run(None, {model_input.name: frame})
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        session.run(None, {model_input.name: frame})
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    data_yaml = sys.argv[1] if len(sys.argv) > 1 else 'data.yaml'
+    detector = sys.argv[2] if len(sys.argv) > 2 else None
+    dataset_dir = 'status_dataset'
+
+    print("=" * 60)
+    print("Behavior Classifier Training (normal / distracted / out-of-frame)")
+    print("=" * 60)
+
+    if not os.path.exists(data_yaml):
+        print(f"❌ {data_yaml} not found!")
+        sys.exit(1)
+
+    print("\n[1/4] Building status dataset from detection labels...")
+    if os.path.exists(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    try:
+        histogram, mappings = build_status_dataset(data_yaml, dataset_dir)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for split, counts in histogram.items():
+        print(f"   {split}: {counts}")
+
+    print("\n[2/4] Training classifier...")
+    if detector:
+        print(f"   Using the backbone of {detector} (architecture and weights)")
+    try:
+        best = train_classifier(dataset_dir, backbone=detector)
+    except Exception as e:
+        print(f"❌ Training failed: {e}")
+        sys.exit(1)
+    print(f"✅ Best model: {best}")
+
+    print("\n[3/4] Exporting (ONNX + TF.js, output [1, 3])...")
+    onnx_path, tfjs_path = export_classifier(best)
+    print(f"✅ ONNX:  {onnx_path}")
+    print(f"✅ TF.js: {tfjs_path}")
+    print(f"   Output order: {STATUSES}")
+
+    print("\n[4/4] Benchmark vs detector...")
+    cls_acc = classifier_accuracy(best, dataset_dir)
+    cls_ms = onnx_latency(onnx_path)
+    print(f"   Classifier: status accuracy {cls_acc:.3f}, {cls_ms:.1f} ms/frame")
+    if detector:
+        det_onnx = os.path.splitext(detector)[0] + '.onnx'
+        det_acc = detector_accuracy(detector, dataset_dir, mappings)
+        print(f"   Detector:   status accuracy {det_acc:.3f}", end='')
+        if os.path.exists(det_onnx):
+            det_ms = onnx_latency(det_onnx)
+            print(f", {det_ms:.1f} ms/frame (+ JS loop over 25200 candidates)")
+            print(f"   Speedup: {det_ms / cls_ms:.1f}x")
+        else:
+            print(f"\n   (export {det_onnx} to compare latency)")
+    else:
+        print("   Pass the detector .pt as the 2nd argument to compare")
+
+    print("\n📋 Next:")
+    print(f"1. Copy: {onnx_path} → public/models/classifier.onnx")
+    print("2. Load it with useYOLOv5Detection:")
+    print("   modelPath: '/models/classifier.onnx',")
+    print(f"   inputSize: {IMGSZ},")
+
+
+if __name__ == "__main__":
+    main()